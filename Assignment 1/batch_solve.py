@@ -0,0 +1,182 @@
+'''Batch solver for Sokoban.
+
+   Reads levels in the ASCII format of SokobanState.state_string (see
+   sokoban.parse_state_string) from files or stdin, one map after another,
+   and solves them in a pool of worker processes, writing one JSON line per
+   level (in the order the levels finish) as soon as it is solved:
+
+   {"index": 0, "status": "solved", "cost": 12, "plan": ["0 up", ...], "stats": {...}, "time": 0.4}
+
+   status is "solved", "unsolved" (no plan found in time), "timeout" (the
+   worker did not report back in time and was killed), "memory" (the search
+   ran out of its memory cap) or "error". Every level is searched in a fresh
+   process that exits when it is done, so the search graph of a level (and
+   the StateSpace counters) are freed before the next level starts, and the
+   batch process itself only holds the levels being solved.
+
+   python batch_solve.py levels.txt --timebound 10 --memory 1024 --processes 4 > results.jsonl
+'''
+
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:
+    #no memory caps outside unix
+    resource = None
+
+from search import *
+from sokoban import parse_state_string
+from portfolio import plan
+import solution
+
+#Seconds a worker is given beyond its time bound to report before it is killed
+_GRACE = 2.0
+
+def read_levels(lines):
+    '''
+    Split a stream of lines into the text of its maps: runs of lines starting
+    with '#', the other lines separating them.
+    @return: An iterator of strings.
+    '''
+    rows = []
+    for line in lines:
+        if line.startswith('#'):
+            rows.append(line)
+        elif rows:
+            yield ''.join(rows)
+            rows = []
+    if rows:
+        yield ''.join(rows)
+
+def solve_level(text, strategy = 'ara', heuristic = 'heur_alternate', weight = 5, timebound = 10):
+    '''
+    Solve one level (in the calling process).
+    @param strategy: 'ara' for anytime repairing astar starting at weight, 'gbfs' for
+                     anytime greedy best first search.
+    @param heuristic: The name of a heuristic function of solution.py.
+    @return: The record of the level, a dict (without its index).
+    '''
+    start = time.monotonic()
+    state = parse_state_string(text)
+    heur_fn = getattr(solution, heuristic)
+    if strategy == 'ara':
+        se = SearchEngine('ara', 'full')
+        wrapped_fval_function = (lambda sN: solution.fval_function(sN, se.weight))
+        se.init_search(state, solution.sokoban_goal_state, heur_fn, wrapped_fval_function)
+        final = se.ara_search(timebound, solution.weight_schedule(weight))
+    elif strategy == 'gbfs':
+        se = SearchEngine('best_first', 'full')
+        se.init_search(state, solution.sokoban_goal_state, heur_fn)
+        final = False
+        costbound = None
+        while time.monotonic() - start < timebound:
+            sol = se.search(timebound - (time.monotonic() - start), costbound)
+            if not sol:
+                break
+            final = sol
+            costbound = (sol.gval - 1, float('inf'), float('inf'))
+    else:
+        raise ValueError("Unknown strategy {}".format(strategy))
+    record = {'status': 'solved' if final else 'unsolved',
+              'cost': final.gval if final else None,
+              'plan': plan(final) if final else None,
+              'stats': se.stats.as_dict()}
+    record['time'] = time.monotonic() - start
+    return record
+
+def _worker(conn, text, options, memory):
+    #runs in a fresh process: cap its memory, solve, send the record back
+    try:
+        if memory and resource is not None:
+            limit = memory * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        #the search prints its time outs on stdout, which carries the results
+        sys.stdout = sys.stderr
+        record = solve_level(text, **options)
+    except MemoryError:
+        record = {'status': 'memory'}
+    except Exception:
+        record = {'status': 'error', 'error': traceback.format_exc(limit=3)}
+    conn.send(record)
+    conn.close()
+
+def solve_stream(levels, processes = None, memory = None, **options):
+    '''
+    Solve a stream of levels with at most processes workers at a time.
+    @param levels: An iterator of level texts (see read_levels).
+    @param memory: The address space cap of a worker, in megabytes (None for no cap).
+    @param options: The options of solve_level (strategy, heuristic, weight, timebound).
+    @return: An iterator of the records of the levels, with their index in the stream,
+             in the order they finish.
+    '''
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    timebound = options.get('timebound', 10)
+    levels = enumerate(levels)
+    running = dict()   #connection -> (index, process, kill time)
+    exhausted = False
+    while True:
+        while not exhausted and len(running) < processes:
+            try:
+                index, text = next(levels)
+            except StopIteration:
+                exhausted = True
+                break
+            receiver, sender = multiprocessing.Pipe(False)
+            process = multiprocessing.Process(target=_worker, args=(sender, text, options, memory))
+            process.start()
+            sender.close()
+            running[receiver] = (index, process, time.monotonic() + timebound + _GRACE)
+        if not running:
+            return
+
+        wait = max(0, min(kill for index, process, kill in running.values()) - time.monotonic())
+        ready = multiprocessing.connection.wait(list(running), wait)
+        now = time.monotonic()
+        for conn in list(running):
+            index, process, kill = running[conn]
+            if conn in ready:
+                try:
+                    record = conn.recv()
+                except EOFError:
+                    #the worker died without a word (e.g., killed for its memory)
+                    record = {'status': 'memory' if memory else 'error'}
+            elif now >= kill:
+                process.terminate()
+                record = {'status': 'timeout'}
+            else:
+                continue
+            conn.close()
+            process.join()
+            del running[conn]
+            record['index'] = index
+            yield record
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve Sokoban levels in a batch, writing JSON lines")
+    parser.add_argument('files', nargs='*', help="files of levels (stdin if none)")
+    parser.add_argument('--strategy', choices=('ara', 'gbfs'), default='ara')
+    parser.add_argument('--heuristic', default='heur_alternate', help="heuristic function of solution.py")
+    parser.add_argument('--weight', type=float, default=5, help="initial weight of 'ara'")
+    parser.add_argument('--timebound', type=float, default=10, help="seconds per level")
+    parser.add_argument('--memory', type=int, default=None, help="megabytes per level")
+    parser.add_argument('--processes', type=int, default=None, help="levels at a time")
+    args = parser.parse_args()
+
+    def lines():
+        if not args.files:
+            yield from sys.stdin
+        for name in args.files:
+            with open(name) as f:
+                yield from f
+
+    for record in solve_stream(read_levels(lines()), args.processes, args.memory, strategy=args.strategy,
+                               heuristic=args.heuristic, weight=args.weight, timebound=args.timebound):
+        print(json.dumps(record, sort_keys=True), flush=True)
@@ -0,0 +1,214 @@
+'''Benchmark suite for Sokoban.
+
+   Runs every level of PROBLEMS, plus a set of larger levels built by
+   sokoban_generator, through every search configuration of CONFIGS, each
+   run in a fresh process, and records per run: the cost of the best plan,
+   the node expansions (in all and up to the first solution) and generated
+   states, the peak memory of the process, and the times to the first and
+   to the best solution. The results are written as JSON, and compared with a
+   stored baseline: a run regresses when it solves fewer levels, finds a
+   costlier plan or needs more expansions or time than the baseline allows
+   (by a relative threshold), so a change to a heuristic in solution.py can
+   be checked for speed ups and slow downs.
+
+   python benchmark.py --out results.json                       #record
+   python benchmark.py --out new.json --baseline results.json   #compare
+'''
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    #no peak memory outside unix
+    resource = None
+
+from search import *
+from sokoban import PROBLEMS
+from sokoban_generator import generate_levels
+import solution
+
+#Configurations: (name, strategy, heuristic, weight). 'astar' runs one astar
+#search, 'ara' anytime repairing astar starting at weight, 'gbfs' anytime
+#greedy best first search. Heuristics are named by their function in solution.py.
+CONFIGS = (
+    ('astar-manhattan', 'astar', 'heur_manhattan_distance', None),
+    ('astar-matching', 'astar', 'heur_matching', None),
+    ('gbfs-alternate', 'gbfs', 'heur_alternate', None),
+    ('ara-alternate-5', 'ara', 'heur_alternate', 5),
+    ('ara-matching-5', 'ara', 'heur_matching', 5),
+)
+
+#Default thresholds: how much larger than the baseline a value may get
+#(the total expansions are only compared between runs that completed their search
+#before the time bound, as those of the others depend on the speed of the machine)
+THRESHOLDS = {'expansions': 0.10, 'expansions_to_first': 0.10, 'time_to_first': 0.25, 'time_to_best': 0.25,
+              'cost': 0.0}
+
+#Below this many seconds time differences are noise
+_MIN_TIME = 0.05
+
+def generated_levels(count):
+    '''
+    @return: count levels larger than those of PROBLEMS (see sokoban_generator), the
+             i-th of them (6+2i)x(6+2i) with 2+i boxes and 1+i//2 robots. They are
+             the same on every call.
+    '''
+    levels = []
+    for i in range(0, count):
+        size = 6 + 2 * i
+        levels.extend(generate_levels(size, size, density=0.1, boxes=2 + i, robots=1 + i // 2, seed=i, count=1))
+    return levels
+
+def benchmark_levels(generated = 4):
+    '''@return: A list of (name, state) pairs: the levels of PROBLEMS and generated levels.'''
+    levels = [("problem-{}".format(i), state) for i, state in enumerate(PROBLEMS)]
+    levels += [("generated-{}".format(i), state) for i, state in enumerate(generated_levels(generated))]
+    return levels
+
+def _peak_memory():
+    #peak resident set size of this process in kilobytes (Linux reports kilobytes, macOS bytes)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_config(level, config, timebound):
+    '''
+    Solve a level with a configuration (in the calling process).
+    @return: The record of the run, a dict.
+    '''
+    name, strategy, heuristic, weight = config
+    heur_fn = getattr(solution, heuristic)
+    solutions = []
+    start = time.monotonic()
+
+    def on_solution(state):
+        solutions.append((time.monotonic() - start, state.gval, se.stats.expansions))
+
+    if strategy == 'ara':
+        se = SearchEngine('ara', 'full')
+        wrapped_fval_function = (lambda sN: solution.fval_function(sN, se.weight))
+        se.init_search(level, solution.sokoban_goal_state, heur_fn, wrapped_fval_function)
+        se.ara_search(timebound, solution.weight_schedule(weight), on_solution=on_solution)
+    else:
+        se = SearchEngine('astar' if strategy == 'astar' else 'best_first', 'full')
+        se.init_search(level, solution.sokoban_goal_state, heur_fn)
+        costbound = None
+        while True:
+            remaining = timebound - (time.monotonic() - start)
+            final = se.search(remaining, costbound) if remaining > 0 else False
+            if not final:
+                break
+            on_solution(final)
+            if strategy == 'astar':
+                break
+            costbound = (final.gval - 1, float('inf'), float('inf'))
+
+    best = min(solutions, key=lambda s: s[1]) if solutions else None
+    seconds = time.monotonic() - start
+    return {'config': name,
+            'solved': bool(solutions),
+            'cost': best[1] if best else None,
+            'expansions': se.stats.expansions,
+            'expansions_to_first': solutions[0][2] if solutions else None,
+            'completed': not se.deadline.done and seconds < timebound,
+            'generated': se.stats.generated,
+            'peak_memory_kb': _peak_memory(),
+            'time_to_first': solutions[0][0] if solutions else None,
+            'time_to_best': best[0] if best else None,
+            'time': seconds}
+
+def _run_job(job):
+    level_name, level, config, timebound = job
+    record = run_config(level, config, timebound)
+    record['level'] = level_name
+    return record
+
+def run_benchmark(levels = None, configs = CONFIGS, timebound = 5, processes = 1):
+    '''
+    Run every configuration on every level, each run in a fresh worker process.
+    @param levels: (name, state) pairs, benchmark_levels() by default.
+    @param processes: The number of runs at a time (keep 1 for stable timings).
+    @return: The results: a dict with the settings and the list of run records.
+    '''
+    if levels is None:
+        levels = benchmark_levels()
+    jobs = [(name, state, config, timebound) for name, state in levels for config in configs]
+    with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+        runs = pool.map(_run_job, jobs, chunksize=1)
+    return {'timebound': timebound,
+            'configs': [config[0] for config in configs],
+            'python': sys.version.split()[0],
+            'runs': runs}
+
+def compare(results, baseline, thresholds = THRESHOLDS):
+    '''
+    Compare results with a baseline (both as returned by run_benchmark).
+    @return: The list of regressions, as strings; empty if there is none.
+    '''
+    old_runs = dict(((run['level'], run['config']), run) for run in baseline['runs'])
+    regressions = []
+    for run in results['runs']:
+        old = old_runs.get((run['level'], run['config']))
+        if old is None or not old['solved']:
+            continue
+        where = "{} {}".format(run['level'], run['config'])
+        if not run['solved']:
+            regressions.append("{}: no longer solved".format(where))
+            continue
+        for key, threshold in sorted(thresholds.items()):
+            if key == 'expansions' and not (run['completed'] and old['completed']):
+                continue
+            new_value, old_value = run[key], old[key]
+            if key.startswith('time'):
+                old_value = max(old_value, _MIN_TIME)
+            if new_value > old_value * (1 + threshold):
+                regressions.append("{}: {} {} -> {} (+{:.0%})".format(
+                    where, key, old[key], new_value, new_value / old_value - 1 if old_value else float('inf')))
+    return regressions
+
+def summary(results):
+    '''@return: Per configuration totals of a benchmark: (config, solved, expansions, time).'''
+    totals = []
+    for config in results['configs']:
+        runs = [run for run in results['runs'] if run['config'] == config]
+        totals.append((config, sum(run['solved'] for run in runs),
+                       sum(run['expansions'] for run in runs), sum(run['time'] for run in runs)))
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sokoban benchmark suite")
+    parser.add_argument('--out', default='benchmark.json', help="file to write the results to")
+    parser.add_argument('--baseline', help="results to compare with")
+    parser.add_argument('--timebound', type=float, default=5, help="seconds per run")
+    parser.add_argument('--generated', type=int, default=4, help="number of generated levels")
+    parser.add_argument('--configs', help="comma separated names of the configurations to run")
+    parser.add_argument('--processes', type=int, default=1, help="runs at a time")
+    for key, threshold in sorted(THRESHOLDS.items()):
+        parser.add_argument('--max-' + key.replace('_', '-'), type=float, default=threshold, dest=key,
+                            help="allowed relative increase of {} (default {})".format(key, threshold))
+    args = parser.parse_args()
+
+    configs = CONFIGS
+    if args.configs:
+        names = args.configs.split(',')
+        configs = [config for config in CONFIGS if config[0] in names]
+    results = run_benchmark(benchmark_levels(args.generated), configs, args.timebound, args.processes)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    for config, solved, expansions, seconds in summary(results):
+        print("{:20} solved {:3}  expansions {:9}  time {:8.2f}s".format(config, solved, expansions, seconds))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, dict((key, getattr(args, key)) for key in THRESHOLDS))
+        for regression in regressions:
+            print("REGRESSION", regression)
+        print("{} regressions".format(len(regressions)))
+        sys.exit(1 if regressions else 0)
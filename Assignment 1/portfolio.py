@@ -0,0 +1,191 @@
+'''Portfolio solver for Sokoban.
+
+   Runs several search configurations (anytime greedy best first search and
+   anytime repairing astar with different weights and heuristics) in a pool
+   of processes on the same problem. The cost of the best solution found by
+   any of them is kept in shared memory, and every worker prunes the states
+   that cannot beat it, so all the configurations profit from the solutions
+   of the others. When the time bound expires the cheapest plan found is
+   returned, or earlier when a configuration proves that no cheaper plan
+   exists: it exhausted its search space (see SearchEngine.exhausted), with
+   an admissible heuristic for anytime repairing astar.
+'''
+
+import multiprocessing
+import queue
+import threading
+import time
+
+from search import *
+from sokoban import PROBLEMS
+from solution_cache import ADMISSIBLE
+import solution
+
+#Configurations run by default: (strategy, heuristic, weight). 'best_first'
+#runs anytime greedy best first search, 'ara' anytime repairing astar
+#starting at the given weight. Heuristics are named by their function in
+#solution.py.
+PORTFOLIO = (
+    ('best_first', 'heur_alternate', None),
+    ('ara', 'heur_alternate', 10),
+    ('ara', 'heur_alternate', 5),
+    ('ara', 'heur_alternate', 2),
+    ('ara', 'heur_matching', 5),
+    ('best_first', 'heur_matching', None),
+)
+
+#Shared between the workers of a pool (set up by _init_worker).
+_best_cost = None
+_lock = None
+_results = None
+_cancel = None
+
+def _init_worker(best_cost, lock, results, cancel):
+    global _best_cost, _lock, _results, _cancel
+    _best_cost = best_cost
+    _lock = lock
+    _results = results
+    _cancel = cancel
+
+def _report(state):
+    '''Publish a solution if it improves on the best known cost.'''
+    with _lock:
+        if state.gval >= _best_cost.value:
+            return
+        _best_cost.value = state.gval
+    _results.put((state.gval, plan(state)))
+
+def _over_best_cost(state):
+    '''Pruning stage: the state cannot lead to a solution cheaper than the best known.'''
+    return state.gval >= _best_cost.value
+
+def _run_config(config, initial_state, timebound):
+    '''
+    Worker: run one configuration until it exhausts its search or its time.
+    @return: Whether the configuration proved that no plan is cheaper than the best one posted.
+    '''
+    strategy, heuristic, weight = config
+    heur_fn = getattr(solution, heuristic)
+    stop_time = time.monotonic() + timebound
+
+    if strategy == 'ara':
+        se = SearchEngine('ara', 'full')
+        se.set_cancel_token(_cancel)
+        wrapped_fval_function = (lambda sN: solution.fval_function(sN, se.weight))
+        se.init_search(initial_state, solution.sokoban_goal_state, heur_fn, wrapped_fval_function,
+                       pruning_stages=[_over_best_cost])
+        se.ara_search(timebound, solution.weight_schedule(weight), on_solution=_report)
+        return se.exhausted and heur_fn in ADMISSIBLE
+
+    se = SearchEngine(strategy, 'full')
+    se.set_cancel_token(_cancel)
+    se.init_search(initial_state, solution.sokoban_goal_state, heur_fn,
+                   pruning_stages=[_over_best_cost])
+    while time.monotonic() < stop_time and not _cancel.is_set():
+        final = se.search(stop_time - time.monotonic())
+        if not final:
+            #pruned by the best cost only, so running out of states is a proof
+            return se.exhausted
+        _report(final)
+    return False
+
+def plan(state):
+    '''@return: The list of the actions leading to state from the initial state.'''
+    return state.path_actions()
+
+def replay(initial_state, actions):
+    '''@return: The state reached by applying the actions of a plan to initial_state.'''
+    state = initial_state
+    for action in actions:
+        for succ in state.successors():
+            if succ.action == action:
+                state = succ
+                break
+        else:
+            raise ValueError("Action {} is not applicable".format(action))
+    return state
+
+def portfolio_solve(initial_state, timebound=10, configs=PORTFOLIO, processes=None):
+    '''
+    Solve a Sokoban problem with a portfolio of search configurations.
+    @param initial_state: The state to start from (SokobanState or PackedSokobanState).
+    @param timebound: The wall clock time, in seconds, to spend.
+    @param configs: The configurations to run, see PORTFOLIO.
+    @param processes: The number of worker processes (defaults to one per
+    configuration, at most one per CPU). Configurations beyond that wait for
+    a free worker. With a single process the configurations run in turn in
+    this process instead, each with an equal share of the time left (see
+    _solve_in_turn), so that a single CPU does not run the first one only.
+    @return: The cheapest goal state found, or False.
+    '''
+    if processes is None:
+        processes = min(len(configs), multiprocessing.cpu_count())
+    stop_time = time.monotonic() + timebound
+    if processes == 1:
+        best = _solve_in_turn(initial_state, stop_time, configs)
+        return replay(initial_state, best[1]) if best is not None else False
+    best_cost = multiprocessing.RawValue('d', float('inf'))
+    lock = multiprocessing.Lock()
+    results = multiprocessing.Queue()
+    cancel = multiprocessing.Event()
+
+    best = None
+    jobs = []
+    pool = multiprocessing.Pool(processes, _init_worker, (best_cost, lock, results, cancel))
+    try:
+        jobs = [pool.apply_async(_run_config, (config, initial_state, timebound)) for config in configs]
+        while time.monotonic() < stop_time and not all(job.ready() for job in jobs):
+            best = _drain(results, best, min(0.05, max(0, stop_time - time.monotonic())))
+            if any(job.ready() and job.successful() and job.get() for job in jobs):
+                #the best plan posted is optimal (give its message a moment to arrive)
+                best = _drain(results, best, 0.05)
+                break
+    finally:
+        #ask the workers to stop, and give them a moment to post their last solutions
+        cancel.set()
+        grace = time.monotonic() + 0.1
+        while time.monotonic() < grace and not all(job.ready() for job in jobs):
+            best = _drain(results, best, 0.01)
+        pool.terminate()
+        pool.join()
+    best = _drain(results, best, 0)
+
+    if best is None:
+        return False
+    return replay(initial_state, best[1])
+
+def _solve_in_turn(initial_state, stop_time, configs):
+    '''
+    Run the configurations one after the other in this process, sharing the
+    best cost like the workers of a pool, until one of them proves the best
+    plan optimal or stop_time is reached.
+    @return: The (cost, actions) of the best plan found, or None.
+    '''
+    results = queue.Queue()
+    _init_worker(multiprocessing.RawValue('d', float('inf')), threading.Lock(), results, threading.Event())
+    best = None
+    for i, config in enumerate(configs):
+        share = (stop_time - time.monotonic()) / (len(configs) - i)
+        if share <= 0:
+            break
+        proven = _run_config(config, initial_state, share)
+        best = _drain(results, best, 0)
+        if proven:
+            break
+    return best
+
+def _drain(results, best, wait):
+    '''Read the solutions posted by the workers, keeping the cheapest.'''
+    try:
+        while True:
+            cost, actions = results.get(True, wait) if wait else results.get_nowait()
+            wait = 0
+            if best is None or cost < best[0]:
+                best = (cost, actions)
+    except queue.Empty:
+        return best
+
+if __name__ == "__main__":
+    for i in range(0, len(PROBLEMS)):
+        final = portfolio_solve(PROBLEMS[i], timebound=5)
+        print("PROBLEM {}: {}".format(i, final.gval if final else "no solution"))
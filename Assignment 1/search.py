@@ -0,0 +1,1744 @@
+'''Search routines.
+   A) Class StateSpace
+
+      An abstract base class for representing the states in a search
+      space.  Each state has a pointer to the parent that was used to
+      generate it, and the cost of g-value of the sequence of actions
+      that was used to generate it.
+
+      Equivalent states can be reached via different paths, so to
+      avoid exploring the same state multiple times the search
+      routines employ cycle checking using hashing techniques. Hence,
+      each StateSpace state (or object) must be able to return an
+      immutable representation that uniquely represents the state and
+      can be used to index into a dictionary. States can optionally
+      use Zobrist hashing (see ZobristKeys) so that the hash of a
+      successor is derived from the hash of its parent.
+
+      The StateSpace class must be specialized for the particular problem. Each
+      particular problem will define a subclass of StateSpace that will also
+      include information specific to that problem. See WaterJugs.py for an
+      example, and the Class implementation for more details.
+
+
+    B) class SearchEngine
+
+      objects of this class define the search routines. They utilize
+      two auxiliary classes (1) Class sNode---the objects of this class
+      are used to represent nodes in the search space (these nodes
+      contain problem states, i.e., StateSpace objects but they are
+      search nodes not states of the state space.  (2) Class
+      Open---these objects are used to store the set of unexpanded
+      nodes. These objects are search strategy specific. For example,
+      Open is implemented as a stack when doing depth-first search, as
+      a priority queue when doing astar search etc.
+
+      The main routines that the user will employ are in the SearchEngine class.
+      These include the ability to set the search strategy, and to invoke
+      search (using the init_search method) and resume the search after
+      a goal is found (using searchOpen). See the implementation for details. 
+
+    '''
+import heapq
+import itertools
+from collections import deque
+import sys
+import copy
+import json
+import time
+import random
+from array import array
+
+class ZobristKeys:
+    '''Random 64-bit keys for Zobrist hashing, one per feature (any
+       hashable value describing a part of a state, e.g., ('box', (x, y))),
+       drawn from a seeded generator on first use. The Zobrist hash of a
+       state is the XOR of the keys of its features, so the hash of a
+       successor is the hash of its parent XOR the keys of the features
+       the action removed and added.'''
+
+    def __init__(self, seed = 384):
+        self.random = random.Random(seed)
+        self.keys = dict()
+
+    def __getitem__(self, feature):
+        key = self.keys.get(feature)
+        if key is None:
+            key = self.keys[feature] = self.random.getrandbits(64)
+        return key
+
+    def hash(self, features):
+        '''@return: The XOR of the keys of features.'''
+        h = 0
+        for feature in features:
+            h ^= self[feature]
+        return h
+
+#The keys shared by all the states
+ZOBRIST = ZobristKeys()
+
+class StateSpace:
+    '''Abstract class for defining State spaces for search routines'''
+    n = 0
+    __slots__ = ('action', 'gval', 'parent', 'index', 'zobrist', 'trace')
+    
+    def __init__(self, action, gval, parent):
+        '''Problem specific state space objects must always include the data items
+           a) self.action === the name of the action used to generate
+              this state from parent. If it is the initial state a good
+              convention is to supply the action name "START"
+           b) self.gval === a number (integer or real) that is the cost
+              of getting to this state.
+           c) parent the state from which this state was generated (by
+              applying "action"
+        '''
+        self.action = action
+        self.gval = gval
+        self.parent = parent
+        self.index = StateSpace.n
+        StateSpace.n = StateSpace.n + 1
+        self.zobrist = None
+        self.trace = None
+
+    def successors(self):
+        '''This method when invoked on a state space object must return a
+           list of successor states, each with the data items "action"
+           the action used to generate this successor state, "gval" the
+           gval of self plus the cost of the action, and parent set to self.
+           Also any problem specific data must be specified property.'''        
+        raise Exception("Must be overridden in subclass.")
+
+    def hashable_state(self):
+        '''This method must return an immutable and unique representation
+           of the state represented by self. The return value, e.g., a
+           string or tuple, will be used by hashing routines. So if obj1 and
+           obj2, both StateSpace objects then obj1.hashable_state() == obj2.hashable_state()
+           if and only if obj1 and obj2 represent the same problem state.'''
+        raise Exception("Must be overridden in subclass.")
+
+    def packed_key(self):
+        '''Optional: return a non-negative integer that uniquely represents
+           the state represented by self, i.e., obj1.packed_key() == obj2.packed_key()
+           if and only if obj1 and obj2 represent the same problem state.
+           Only needed by compact cycle checking, which stores these keys in
+           a CompactClosedList.'''
+        raise Exception("Must be overridden in subclass to use compact cycle checking.")
+
+    def zobrist_features(self):
+        '''Optional: return the features (see ZobristKeys) of the state
+           represented by self. Only needed by states that use zobrist_hash.'''
+        raise Exception("Must be overridden in subclass to use Zobrist hashing.")
+
+    def zobrist_hash(self):
+        '''Return the Zobrist hash of the state, e.g., to use as its
+           hashable_state. A subclass should set self.zobrist of the
+           successors it generates from its own zobrist_hash (XOR-ing in
+           the keys of the features the action changed); otherwise it is
+           computed from zobrist_features on first use.'''
+        if self.zobrist is None:
+            self.zobrist = ZOBRIST.hash(self.zobrist_features())
+        return self.zobrist
+
+    def print_state(self):
+        '''Print a representation of the state'''
+        raise Exception("Must be overridden in subclass.")
+
+    def path(self):
+        '''Return the list of states from the initial state to self. The
+           ancestors of a state recorded in a trace store (see TraceStore)
+           are regenerated from the trace.'''
+        s = self
+        states = []
+        while s is not None and s.trace is None:
+            states.append(s)
+            s = s.parent
+        states.reverse()
+        if s is not None:
+            return s.trace.path(s.index) + states
+        return states
+
+    def path_actions(self):
+        '''Return the list of the actions used to reach self'''
+        return [s.action for s in self.path()[1:]]
+
+    def print_path(self):
+        '''print the sequence of actions used to reach self'''
+        #can be over ridden to print problem specific information
+        states = self.path()
+        states.pop(0).print_state()
+        for s in states:
+            print(" ==> ", end="")
+            s.print_state()
+        print("")
+ 
+    def has_path_cycle(self, path = None):
+        '''Returns true if self is equal to a prior state on its path
+           @param path: the set of the hashable states on the path to the
+                        parent of self, if the caller keeps one (the search
+                        engine always does); otherwise the ancestors of self
+                        are walked.'''
+        if path is not None:
+            return self.hashable_state() in path
+        s = self.parent
+        hc = self.hashable_state()
+        while s:
+            if s.hashable_state() == hc:
+                return True
+            s = s.parent
+        return False
+
+#Constants to denote the search strategy. 
+_DEPTH_FIRST = 0
+_BREADTH_FIRST = 1
+_BEST_FIRST = 2
+_ASTAR = 3
+_UCS = 4
+_CUSTOM = 5
+_ARA = 6
+_IDASTAR = 7
+_SMASTAR = 8
+
+#Default node_limit of the memory-bounded strategies: the size of the
+#transposition table of 'idastar', the node budget of 'smastar'.
+_DEFAULT_NODE_LIMIT = 100000
+
+#For best first and astar we use a priority queue. Each node is
+#queued as an entry computed once when it is inserted: (f, -gval, node)
+#for astar, so that ties in f go to the node with the greater gval, and
+#(f, node) for the other key types. Nodes never order each other
+#(sNode.__lt__ is always False), so the remaining ties are left in heap
+#order, as with the original comparator. These constants indicate if f
+#is the gval, the hval, the sum of gval and hval or the value of the
+#custom fval function.
+_SUM_HG = 0
+_H = 1
+_G = 2
+_C = 3
+
+#Cycle Checking. Either CC_NONE 'none' (no cycle checking), CC_PATH
+#'path' (path checking only) or CC_FULL 'full' (full cycle checking,
+#remembering all previously visited nodes).
+_CC_NONE = 0
+_CC_PATH = 1
+_CC_FULL = 2
+
+#Zero Heuristic Function---for uninformed search don't include heur_fn
+#in call to search engine's search method, defaults heur_fn to the zero fn.
+def _zero_hfn(state):
+    '''Null heuristic (zero)'''
+    return 0
+
+def _fval_function(state):
+  '''default fval function results in Best First Search'''  
+  return state.hval 
+
+#The f part of the OPEN key of a node for each key type.
+_KEY_FVAL = {
+    _SUM_HG: lambda node: node.gval + node.hval,
+    _H: lambda node: node.hval,
+    _G: lambda node: node.gval,
+    _C: lambda node: node.fval_function(node),
+}
+
+class sNode:
+    '''Object of this class form the nodes of the search space.  Each
+    node consists of a search space object (determined by the problem
+    definition) along with the h and g values (the g values is
+    redundant as it is stored in the state, but we make a copy in the
+    node object for convenience), and the number of the node'''
+    
+    n = 0
+
+    #Under path checking: the keys of the states on the path to the parent of
+    #the state of the node (shared by the children of a node, never modified)
+    path_keys = frozenset()
+    
+    def __init__(self, state, hval, fval_function):
+        self.state = state
+        self.hval = hval
+        self.gval = state.gval
+        self.index = sNode.n
+        self.fval_function = fval_function
+        sNode.n = sNode.n + 1
+
+    def __lt__(self, other):
+        '''OPEN compares the nodes of entries whose keys are equal: such
+           nodes are left unordered (the heap keeps them in whatever order
+           its sifts leave them), as the original comparator did.'''
+        return False
+
+class Deadline:
+    '''The stopping condition of a search: a wall clock (time.monotonic)
+       time limit and/or a cooperative cancellation token, any object with
+       an is_set method (e.g., a threading.Event or multiprocessing.Event a
+       supervisor sets to stop the search).
+
+       expired is called once per expansion but only reads the clock every
+       K calls, where K is tuned from the measured expansion rate so that
+       the clock is read about every resolution seconds (and at least
+       twice in the time that is left).'''
+
+    def __init__(self, timebound = None, token = None, resolution = 0.005):
+        self.start = time.monotonic()
+        self.stop = self.start + timebound if timebound else None
+        self.token = token
+        self.resolution = resolution
+        self.every = 1
+        self.countdown = 1
+        self.last_check = self.start
+        self.done = False
+
+    def expired(self):
+        '''True once the time limit has passed or the token was set'''
+        self.countdown = self.countdown - 1
+        if self.countdown > 0:
+            return False
+        return self.check()
+
+    def check(self):
+        '''Read the clock and the token now, and retune K'''
+        if self.done:
+            return True
+        now = time.monotonic()
+        if (self.stop is not None and now >= self.stop) or (self.token is not None and self.token.is_set()):
+            self.done = True
+            return True
+        interval = self.resolution
+        if self.stop is not None and (self.stop - now)/2 < interval:
+            interval = (self.stop - now)/2
+        elapsed = now - self.last_check
+        if elapsed > 0:
+            every = int(self.every*interval/elapsed)
+        else:
+            every = 2*self.every
+        #change K by at most a factor of 2 at a time
+        self.every = max(1, min(every, 2*self.every, 1 << 20))
+        self.countdown = self.every
+        self.last_check = now
+        return False
+
+    def elapsed(self):
+        '''Wall clock seconds since the deadline was set'''
+        return time.monotonic() - self.start
+
+class SearchStats:
+    '''Statistics of one search (one call of init_search and the calls of
+       the search routines that follow it). The counters are always kept;
+       the phase timers (seconds spent in successors, the heuristic, the
+       goal function, hashing states and OPEN operations) only while the
+       engine is profiling (see SearchEngine.profile_on).'''
+
+    PHASES = ('successors', 'heuristic', 'goal', 'hashing', 'heap')
+
+    def __init__(self, strategy = None):
+        self.strategy = strategy
+        self.expansions = 0
+        self.generated = 0
+        self.cycle_check_pruned = 0
+        self.cost_bound_pruned = 0
+        self.stage_pruned = []
+        self.stale_pops = 0
+        self.decrease_keys = 0
+        self.frontier_peak = 0
+        self.closed_peak = 0
+        self.search_time = 0.0
+        self.times = dict((phase, 0.0) for phase in self.PHASES)
+
+    def expansions_per_sec(self):
+        return self.expansions / self.search_time if self.search_time > 0 else 0.0
+
+    def as_dict(self):
+        stats = dict(self.__dict__)
+        stats['times'] = dict(self.times)
+        stats['stage_pruned'] = list(self.stage_pruned)
+        stats['expansions_per_sec'] = self.expansions_per_sec()
+        return stats
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+    def __repr__(self):
+        return "SearchStats({})".format(self.to_json())
+
+def _successors(state):
+    '''Generate the successors of state (the expansion step that profiling times)'''
+    return state.successors()
+
+def _timed(fn, times, phase):
+    '''Wrap fn to add the time spent in its calls to times[phase]'''
+    clock = time.perf_counter
+    def timed(*args):
+        start = clock()
+        result = fn(*args)
+        times[phase] = times[phase] + clock() - start
+        return result
+    return timed
+
+class CompactClosedList:
+    '''Closed list of full cycle checking mapping exact packed state keys
+       (non-negative integers, see StateSpace.packed_key) to gvals. The
+       keys are stored as key_words 64 bit words each in an array, probed
+       with linear open addressing, next to a parallel array of 16 bit
+       gvals in which _EMPTY marks a free slot. The table doubles when it
+       is more than 70% full, and widens when a longer key is stored.'''
+
+    _EMPTY = 0xFFFF
+    _WORD = 0xFFFFFFFFFFFFFFFF
+    _FIBONACCI = 0x9E3779B97F4A7C15
+
+    def __init__(self, capacity = 1024, key_words = 1):
+        bits = max(4, (capacity - 1).bit_length())
+        self._allocate(bits, key_words)
+
+    def _allocate(self, bits, key_words):
+        self.bits = bits
+        self.capacity = 1 << bits
+        self.key_words = key_words
+        self.keys = array('Q', bytes(8*self.capacity*key_words))
+        self.gvals = array('H', [self._EMPTY])*self.capacity
+        self.count = 0
+
+    def _words(self, key):
+        '''split key into key_words words, widening the table if needed (a
+           key of a one word table is kept as an int, not split)'''
+        if key >> (64*self.key_words):
+            self._rebuild(self.bits, (key.bit_length() + 63)//64)
+        if self.key_words == 1:
+            return key
+        return [(key >> (64*w)) & self._WORD for w in range(self.key_words)]
+
+    def _find(self, words):
+        '''slot holding the key with the given words, or the free slot ending its probe sequence'''
+        mask = self.capacity - 1
+        keys = self.keys
+        gvals = self.gvals
+        empty = self._EMPTY
+        kw = self.key_words
+        if kw == 1:
+            #Fibonacci hashing of the key itself
+            slot = ((words*self._FIBONACCI) & self._WORD) >> (64 - self.bits)
+            while gvals[slot] != empty:
+                if keys[slot] == words:
+                    return slot
+                slot = (slot + 1) & mask
+            return slot
+        slot = ((hash(tuple(words))*self._FIBONACCI) & self._WORD) >> (64 - self.bits)
+        first = words[0]
+        while gvals[slot] != empty:
+            base = slot*kw
+            if keys[base] == first and keys[base:base + kw].tolist() == words:
+                return slot
+            slot = (slot + 1) & mask
+        return slot
+
+    def _rebuild(self, bits, key_words):
+        '''re-insert every entry in a table of 2**bits slots of key_words words'''
+        old_keys, old_gvals, old_kw = self.keys, self.gvals, self.key_words
+        self._allocate(bits, key_words)
+        pad = [0]*(key_words - old_kw)
+        for slot, gval in enumerate(old_gvals):
+            if gval != self._EMPTY:
+                words = old_keys[slot*old_kw:(slot + 1)*old_kw].tolist() + pad
+                new_slot = self._find(words[0] if key_words == 1 else words)
+                self.keys[new_slot*key_words:(new_slot + 1)*key_words] = array('Q', words)
+                self.gvals[new_slot] = gval
+                self.count = self.count + 1
+
+    def __contains__(self, key):
+        return self.gvals[self._find(self._words(key))] != self._EMPTY
+
+    def __getitem__(self, key):
+        gval = self.gvals[self._find(self._words(key))]
+        if gval == self._EMPTY:
+            raise KeyError(key)
+        return gval
+
+    def get(self, key, default = None):
+        gval = self.gvals[self._find(self._words(key))]
+        return default if gval == self._EMPTY else gval
+
+    def __setitem__(self, key, gval):
+        if not 0 <= gval < self._EMPTY or gval != int(gval):
+            raise ValueError("Compact cycle checking needs integer gvals below {}, got {}".format(self._EMPTY, gval))
+        words = self._words(key)
+        slot = self._find(words)
+        if self.gvals[slot] == self._EMPTY:
+            if 10*(self.count + 1) > 7*self.capacity:
+                self._rebuild(self.bits + 1, self.key_words)
+                slot = self._find(words)
+            kw = self.key_words
+            if kw == 1:
+                self.keys[slot] = words
+            else:
+                self.keys[slot*kw:(slot + 1)*kw] = array('Q', words)
+            self.count = self.count + 1
+        self.gvals[slot] = int(gval)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return "CompactClosedList({} states)".format(self.count)
+
+    def memory_report(self):
+        '''Bytes used by the table, overall and per stored state'''
+        used = self.keys.itemsize*len(self.keys) + self.gvals.itemsize*len(self.gvals)
+        return {'states': self.count, 'capacity': self.capacity, 'key_words': self.key_words,
+                'bytes': used, 'bytes_per_state': used/self.count if self.count else 0.0}
+
+class TraceStore:
+    '''Compact store of the search tree for searches that drop the parent
+       references of their states. Tree node i (the index of its state) is
+       the pair parents[i] (the node of the parent, -1 for the initial
+       state, node 0) and positions[i] (the position of the state in the
+       list of successors of its parent), kept in preallocated arrays that
+       double when full. The path to a node is rebuilt by replaying the
+       successor positions from the initial state, so the successor
+       functions (and their class settings) must not change in between.'''
+
+    def __init__(self, root, capacity = 1024):
+        self.root = root
+        self.parents = array('i', [-1]) * capacity
+        self.positions = array('H', [0]) * capacity
+        self.count = 1
+        #one shared string per action name
+        self.actions = dict()
+
+    def __len__(self):
+        return self.count
+
+    def adopt(self, state, parent, position):
+        '''Record state, successor number position of parent, as a new node:
+           its index becomes the node, and its parent reference is dropped.'''
+        if self.count == len(self.parents):
+            self.parents.extend(self.parents)
+            self.positions.extend(self.positions)
+        self.parents[self.count] = parent.index if parent.trace is self else 0
+        self.positions[self.count] = position
+        state.index = self.count
+        state.trace = self
+        state.parent = None
+        state.action = self.actions.setdefault(state.action, state.action)
+        self.count = self.count + 1
+
+    def path(self, node):
+        '''@return: The states on the path from the initial state to node,
+           regenerated by replaying the trace (each the parent of the next).'''
+        positions = []
+        while node > 0:
+            positions.append(self.positions[node])
+            node = self.parents[node]
+        states = self.root.path()
+        for position in reversed(positions):
+            states.append(states[-1].successors()[position])
+        return states
+
+    def memory_report(self):
+        '''Bytes used by the trace, overall and per recorded state'''
+        used = self.parents.itemsize*len(self.parents) + self.positions.itemsize*len(self.positions)
+        return {'states': self.count, 'bytes': used, 'bytes_per_state': used/self.count}
+
+class SMANode(sNode):
+    """Node of the search tree kept by simplified memory-bounded astar"""
+    def __init__(self, node, parent):
+        sNode.__init__(self, node.state, node.hval, node.fval_function)
+        self.path_keys = node.path_keys
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.children = []
+        self.forgotten = float('inf')   #smallest fval of the evicted children
+        self.fval = None
+        self.expanding = False
+        self.in_open = False
+        self.version = 0
+
+class IndexedHeap:
+    '''Binary heap of OPEN entries (key..., node) indexed by the hashable
+       state of the node, so a state is on the heap at most once. Pushing
+       an entry for a state that is already on the heap replaces the queued
+       entry in place if the new node has a lower gval (decrease-key) and is
+       ignored otherwise, instead of leaving a stale duplicate to be skipped
+       when it is extracted.'''
+
+    def __init__(self):
+        self.heap = []
+        self.keys = []
+        self.position = dict()
+        self.decrease_keys = 0
+
+    def __len__(self): return len(self.heap)
+
+    def __getitem__(self, i): return self.heap[i]
+
+    def __iter__(self): return iter(self.heap)
+
+    def push(self, entry):
+        key = entry[-1].state.hashable_state()
+        i = self.position.get(key)
+        if i is None:
+            self.heap.append(entry)
+            self.keys.append(key)
+            self.position[key] = len(self.heap) - 1
+            self._sift_up(len(self.heap) - 1)
+        elif entry[-1].gval < self.heap[i][-1].gval:
+            self.heap[i] = entry
+            self.decrease_keys = self.decrease_keys + 1
+            self._sift_down(self._sift_up(i))
+
+    def pop(self):
+        entry = self.heap[0]
+        del self.position[self.keys[0]]
+        last_entry = self.heap.pop()
+        last_key = self.keys.pop()
+        if self.heap:
+            self.heap[0] = last_entry
+            self.keys[0] = last_key
+            self.position[last_key] = 0
+            self._sift_down(0)
+        return entry
+
+    def rebuild(self, entries):
+        '''Replace the contents of the heap by entries (keeping the cheapest
+           entry of each state)'''
+        self.heap = []
+        self.keys = []
+        self.position = dict()
+        for entry in entries:
+            key = entry[-1].state.hashable_state()
+            i = self.position.get(key)
+            if i is None:
+                self.heap.append(entry)
+                self.keys.append(key)
+                self.position[key] = len(self.heap) - 1
+            elif entry[-1].gval < self.heap[i][-1].gval:
+                self.heap[i] = entry
+        for i in reversed(range(len(self.heap)//2)):
+            self._sift_down(i)
+
+    def _swap(self, i, j):
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.keys[i], self.keys[j] = self.keys[j], self.keys[i]
+        self.position[self.keys[i]] = i
+        self.position[self.keys[j]] = j
+
+    def _sift_up(self, i):
+        heap = self.heap
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not heap[i] < heap[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+        return i
+
+    def _sift_down(self, i):
+        heap = self.heap
+        n = len(heap)
+        while True:
+            child = 2*i + 1
+            if child >= n:
+                return i
+            if child + 1 < n and heap[child + 1] < heap[child]:
+                child = child + 1
+            if not heap[child] < heap[i]:
+                return i
+            self._swap(i, child)
+            i = child
+
+class Open:
+    '''Open objects hold the search frontier---the set of unexpanded
+       nodes. Depending on the search strategy used we want to extract
+       nodes from this set in different orders, so set up the object's
+       functions to operate as needed by the particular search
+       strategy. With indexed set the priority queue strategies use an
+       IndexedHeap, which holds at most one node per state.
+
+       For the priority queue strategies each node is stored as a tuple
+       (f, node), where f is computed once on insertion. Note for astar
+       (f = g+h) we wish to break ties by extracting the node with the
+       GREATER g value first, so its nodes are stored as (f, -gval, node).
+       This means that we expand nodes along deeper paths first causing
+       the search to proceed directly to the goal. The remaining ties are
+       not broken (see sNode.__lt__), so the nodes come off OPEN in the
+       same order as with the original node comparator.'''
+    
+    def __init__(self, search_strategy, indexed=False):
+        self.key_type = None
+        if search_strategy == _DEPTH_FIRST:
+            #use stack for OPEN set (last in---most recent successor added---is first out)
+            self.open = []
+            self.insert = self.open.append
+            self.extract = self.open.pop
+        elif search_strategy == _BREADTH_FIRST:
+            #use queue for OPEN (first in---earliest node not yet expanded---is first out)
+            self.open = deque()
+            self.insert = self.open.append
+            self.extract = self.open.popleft
+        elif search_strategy == _UCS:
+            #use priority queue for OPEN (first out is node with lowest gval)
+            self.key_type = _G
+        elif search_strategy == _BEST_FIRST:
+            #use priority queue for OPEN (first out is node with lowest hval)
+            self.key_type = _H
+        elif search_strategy == _ASTAR:
+            #use priority queue for OPEN (first out is node with lowest fval = gval+hval)
+            self.key_type = _SUM_HG
+        elif search_strategy in (_CUSTOM, _ARA):
+            #use priority queue for OPEN (first out is node with lowest fval
+            #given by the node's fval function; for anytime repairing astar
+            #this depends on the current weight)
+            self.key_type = _C
+
+        if self.key_type is not None:
+            if indexed:
+                self.open = IndexedHeap()
+                push = self.open.push
+                pop = self.open.pop
+            else:
+                self.open = []
+                push = lambda entry: heapq.heappush(self.open, entry)
+                pop = lambda: heapq.heappop(self.open)
+            fval = _KEY_FVAL[self.key_type]
+            if self.key_type == _SUM_HG:
+                #break ties by greatest gval
+                self.entry = lambda node: (fval(node), -node.gval, node)
+            else:
+                self.entry = lambda node: (fval(node), node)
+            entry = self.entry
+            self.insert = lambda node: push(entry(node))
+            self.extract = lambda: pop()[-1]
+
+    def empty(self): return not self.open
+
+    def __len__(self): return len(self.open)
+
+    def nodes(self):
+        '''The nodes on OPEN, in no particular order'''
+        if self.key_type is None:
+            return list(self.open)
+        return [entry[-1] for entry in self.open]
+
+    def reorder(self, keep=None, extra=()):
+        '''Recompute the keys of the nodes on OPEN after their priorities
+           have changed (e.g., the weight was lowered in anytime repairing
+           astar) and restore the heap order. The nodes in extra are added
+           to OPEN first. If keep is given, only the nodes for which
+           keep(node) is true stay on OPEN.'''
+        nodes = self.nodes() + list(extra)
+        if keep is not None:
+            nodes = [node for node in nodes if keep(node)]
+        if self.key_type is None:
+            self.open.clear()
+            self.open.extend(nodes)
+            return
+        entries = [self.entry(node) for node in nodes]
+        if isinstance(self.open, IndexedHeap):
+            self.open.rebuild(entries)
+        else:
+            self.open[:] = entries
+            heapq.heapify(self.open)
+
+    def print_open(self):
+        print("{", end="")
+        nodes = self.nodes()
+        if len(nodes) == 1: 
+            print("   <S{}:{}:{}, g={}, h={}, f=g+h={}>".format(nodes[0].state.index, nodes[0].state.action, nodes[0].state.hashable_state(), nodes[0].gval, nodes[0].hval, nodes[0].gval+nodes[0].hval), end="")
+        else:
+            for nd in nodes:
+                print("   <S{}:{}:{}, g={}, h={}, f=g+h={}>".format(nd.state.index, nd.state.action, nd.state.hashable_state(), nd.gval, nd.hval, nd.gval+nd.hval), end="")
+        print("}")
+
+class SearchEngine:
+    def __init__(self, strategy = 'depth_first', cc_level = 'default', frontier = 'default', node_limit = None,
+                 trace_store = False):
+        self.set_strategy(strategy, cc_level, frontier, node_limit, trace_store)
+        self.trace = 0
+        self.weight = 1
+        self.cancel_token = None
+        self.deadline = Deadline()
+        #set when the last call to search or ara_search stopped because the
+        #search space (within the cost bound) was used up, not for lack of time
+        self.exhausted = False
+        self.profile_off()
+
+    def initStats(self):
+        #sNode.n and StateSpace.n only number nodes and states (across all
+        #searches); the statistics of this search are kept in self.stats
+        self.stats = SearchStats(self.get_strategy())
+
+    def closed_list_memory(self):
+        '''Report the memory used by the cycle check dictionary of the last
+           search with full cycle checking (an estimate for a dict, which
+           counts the dict itself, its keys and their items).'''
+        if self.compact_closed:
+            return self.cc_dictionary.memory_report()
+        used = sys.getsizeof(self.cc_dictionary)
+        for key in self.cc_dictionary:
+            used = used + sys.getsizeof(key)
+            if isinstance(key, tuple):
+                used = used + sum(sys.getsizeof(item) for item in key)
+        count = len(self.cc_dictionary)
+        return {'states': count, 'bytes': used, 'bytes_per_state': used/count if count else 0.0}
+
+    def trace_on(self, level = 1):
+        '''For debugging, set tracking level 1 or 2'''
+        self.trace = level
+
+    def trace_off(self):
+        '''Turn off tracing'''
+        self.trace = 0
+
+    def set_cancel_token(self, token = None):
+        '''Stop the searches started from now on (returning False, as on a
+           timeout) once token.is_set() is true, e.g., a threading.Event or a
+           multiprocessing.Event set by a supervisor. None removes the token.'''
+        self.cancel_token = token
+
+    def profile_on(self, sample_every = None, sample_hook = None):
+        '''Time the phases of the searches started from now on (see
+           SearchStats). If sample_hook is given, it is called with
+           self.stats every sample_every expansions.'''
+        self.profiling = True
+        self.sample_every = sample_every if sample_hook is not None else None
+        self.sample_hook = sample_hook
+
+    def profile_off(self):
+        '''Turn off profiling'''
+        self.profiling = False
+        self.sample_every = None
+        self.sample_hook = None
+
+    def _profile_setup(self):
+        '''Wrap the functions of the search set up by init_search in phase timers'''
+        self.expand_state = _successors
+        if not self.profiling:
+            return
+        times = self.stats.times
+        self.expand_state = _timed(_successors, times, 'successors')
+        self.goal_fn = _timed(self.goal_fn, times, 'goal')
+        self.heur_fn = _timed(self.heur_fn, times, 'heuristic')
+        if self.batch_heur_fn is not None:
+            self.batch_heur_fn = _timed(self.batch_heur_fn, times, 'heuristic')
+        if self.strategy not in (_IDASTAR, _SMASTAR):
+            self.state_key = _timed(self.state_key, times, 'hashing')
+            self.open.insert = _timed(self.open.insert, times, 'heap')
+            self.open.extract = _timed(self.open.extract, times, 'heap')
+
+    def _expand(self, node):
+        '''Generate the successors of node, counting the expansion'''
+        successors = self.expand_state(node.state)
+        stats = self.stats
+        stats.expansions = stats.expansions + 1
+        stats.generated = stats.generated + len(successors)
+        if self.sample_every and stats.expansions % self.sample_every == 0:
+            self.sample_hook(stats)
+        return successors
+
+    def _finish_stats(self, clock_start):
+        '''Add the time since clock_start to the search time of self.stats'''
+        self.stats.search_time = self.stats.search_time + time.perf_counter() - clock_start
+        if self.indexed_frontier and self.strategy not in (_IDASTAR, _SMASTAR):
+            self.stats.decrease_keys = self.open.open.decrease_keys
+
+    def set_strategy(self, s, cc = 'default', frontier = 'default', node_limit = None, trace_store = False):
+        '''frontier selects the OPEN implementation of the priority queue
+           strategies: 'default' (a heap that may hold stale duplicates of a
+           state, skipped when extracted) or 'indexed' (an IndexedHeap with
+           decrease-key holding each state at most once, needs full cycle
+           checking).
+
+           The memory-bounded strategies 'idastar' (iterative deepening
+           astar with a transposition table of at most node_limit states)
+           and 'smastar' (simplified memory-bounded astar keeping at most
+           node_limit nodes) use path checking, not full cycle checking.
+
+           cc 'compact' is full cycle checking that keeps the visited states
+           in a CompactClosedList instead of a dictionary: it needs states
+           that implement packed_key and integer gvals, and stores far
+           more states in the same memory (see closed_list_memory).
+
+           trace_store records the search tree in a TraceStore, a few bytes
+           per state, and drops the parent references of the states put on
+           OPEN, so the states expanded can be freed. The paths are rebuilt
+           from the trace (see StateSpace.path), which needs full or no cycle
+           checking (and is not used by the memory-bounded strategies).'''
+        if not s in ['depth_first', 'breadth_first', 'ucs', 'best_first', 'astar', 'custom', 'ara', 'idastar', 'smastar']:
+            print('Unknown search strategy specified:', s)
+            print("Must be one of 'depth_first', 'ucs', 'breadth_first', 'best_first', 'custom', 'ara', 'idastar', 'smastar' or 'astar'")
+        elif not cc in ['default', 'none', 'path', 'full', 'compact']:
+            print('Unknown cycle check level', cc)
+            print( "Must be one of ['default', 'none', 'path', 'full', 'compact']")
+        elif s == 'ara' and cc not in ['default', 'full', 'compact']:
+            print('Anytime repairing astar requires full cycle checking')
+        elif s in ['idastar', 'smastar'] and cc in ['full', 'compact']:
+            print('Memory-bounded search strategies cannot use full cycle checking')
+        elif not frontier in ['default', 'indexed']:
+            print('Unknown frontier', frontier)
+            print("Must be one of ['default', 'indexed']")
+        elif frontier == 'indexed' and (cc in ['none', 'path'] or
+                                        (cc == 'default' and s in ['depth_first', 'idastar', 'smastar'])):
+            print('The indexed frontier requires full cycle checking')
+        elif trace_store and (cc == 'path' or s in ['idastar', 'smastar'] or (cc == 'default' and s == 'depth_first')):
+            print('The trace store cannot be used with path checking or memory-bounded search')
+
+        else:
+            if cc == 'default' :
+                if s in ['depth_first', 'idastar', 'smastar'] :
+                    self.cycle_check = _CC_PATH
+                else:
+                    self.cycle_check = _CC_FULL
+            elif cc == 'none': self.cycle_check = _CC_NONE
+            elif cc == 'path': self.cycle_check = _CC_PATH
+            elif cc == 'full': self.cycle_check = _CC_FULL
+            elif cc == 'compact': self.cycle_check = _CC_FULL
+
+            self.compact_closed = (cc == 'compact')
+
+            if   s == 'depth_first'  : self.strategy = _DEPTH_FIRST
+            elif s == 'breadth_first': self.strategy = _BREADTH_FIRST
+            elif s == 'ucs' : self.strategy = _UCS               
+            elif s == 'best_first'   : self.strategy = _BEST_FIRST
+            elif s == 'astar'        : self.strategy = _ASTAR       
+            elif s == 'custom' : self.strategy = _CUSTOM             
+            elif s == 'ara'          : self.strategy = _ARA
+            elif s == 'idastar'      : self.strategy = _IDASTAR
+            elif s == 'smastar'      : self.strategy = _SMASTAR
+
+            self.indexed_frontier = (frontier == 'indexed')
+            self.trace_store = trace_store
+            self.node_limit = node_limit if node_limit is not None else _DEFAULT_NODE_LIMIT
+
+    def get_strategy(self):
+        if   self.strategy == _DEPTH_FIRST    : rval = 'depth_first'
+        elif self.strategy == _BREADTH_FIRST  : rval = 'breadth_first'
+        elif self.strategy == _BEST_FIRST     : rval = 'best_first' 
+        elif self.strategy == _UCS          : rval = 'ucs' 
+        elif self.strategy == _ASTAR          : rval = 'astar'      
+        elif self.strategy == _CUSTOM          : rval = 'custom'   
+        elif self.strategy == _ARA             : rval = 'ara'
+        elif self.strategy == _IDASTAR         : rval = 'idastar'
+        elif self.strategy == _SMASTAR         : rval = 'smastar'
+  
+        rval = rval + ' with '
+
+        if   self.cycle_check == _CC_NONE : rval = rval + 'no cycle checking'
+        elif self.cycle_check == _CC_PATH : rval = rval + 'path checking'
+        elif self.cycle_check == _CC_FULL : rval = rval + 'full cycle checking'
+
+        if self.compact_closed: rval = rval + ' (compact closed list)'
+
+        if self.indexed_frontier: rval = rval + ' (indexed frontier)'
+
+        if self.trace_store: rval = rval + ' (trace store)'
+
+        return rval
+
+    def init_search(self, initState, goal_fn, heur_fn=_zero_hfn, fval_function=_fval_function, pruning_stages=(),
+                    batch_heur_fn=None):
+        """
+        Get ready to search. Call search on this object to run the search.
+
+        @param initState: the state of the puzzle to start the search from.
+        @param goal_fn: the goal function for the puzzle
+        @param heur_fn: the heuristic function to use (only relevant for search strategies that use heuristics)
+        @param fval_fn: the f-value function (only relevant for custom, ara, idastar and smastar
+                        search strategies; idastar and smastar use gval+hval by default).
+                        For 'ara' it should read the current weight from self.weight; by
+                        default gval + self.weight*hval is used.
+        @param pruning_stages: a list of functions state -> bool. Each successor that
+                        survives cycle checking is passed to them in order (before heur_fn
+                        is computed) and dropped as soon as one of them returns True. The
+                        number of successors dropped by each stage is kept in self.stats.stage_pruned.
+        @param batch_heur_fn: optional function list of states -> list of heuristic values. If
+                        given it replaces heur_fn: it is called once per expansion on all the
+                        successors that survive cycle checking and the pruning stages.
+        """
+        #Perform full cycle checking as follows
+        #a. check state before inserting into OPEN. If we had already reached
+        #   the same state via a cheaper path, don't insert into OPEN.
+        #b. Sometimes we find a new cheaper path to a state (after the older
+        #   more expensive path to the state has already been inserted.
+        #   We deal with this lazily. We check states extracted from OPEN
+        #   and if we have already expanded that state via a cheaper path
+        #   we don't expand it. If we had expanded the state via a more
+        #   expensive path, we re-expand it.
+        
+        self.initStats()
+        self.pruning_stages = list(pruning_stages)
+        self.stats.stage_pruned = [0] * len(self.pruning_stages)
+
+        #BEGIN TRACING
+        if self.trace:
+            print("   TRACE: Search Strategy: ", self.get_strategy())
+            print("   TRACE: Initial State:", end="")
+            initState.print_state()
+        #END 
+        self.open = Open(self.strategy, self.indexed_frontier)
+
+        if self.strategy == _ARA:
+            #CLOSED holds the states expanded in the current iteration, INCONS
+            #the nodes whose gval improved after their state was expanded.
+            self.ara_closed = set()
+            self.ara_incons = dict()
+            self.ara_incumbent = float('inf')
+            if fval_function is _fval_function:
+                fval_function = self._ara_fval_function
+
+        if batch_heur_fn is not None:
+            heur_fn = lambda state: batch_heur_fn([state])[0]
+        self.batch_heur_fn = batch_heur_fn
+
+        node = sNode(initState, heur_fn(initState), fval_function)      
+
+        self.fval_function = fval_function
+        self.goal_fn = goal_fn
+        self.heur_fn = heur_fn
+        if self.strategy in (_IDASTAR, _SMASTAR):
+            #memory-bounded searches keep their own frontier in a generator
+            #that search() resumes (so search can be continued after a goal)
+            if fval_function is _fval_function:
+                fval_function = self.fval_function = _KEY_FVAL[_SUM_HG]
+            node = sNode(initState, node.hval, fval_function)
+            if self.strategy == _IDASTAR:
+                self.bounded_search = self._idastar(node)
+            else:
+                self.bounded_search = self._smastar(SMANode(node, None))
+            self._profile_setup()
+            return
+
+        #the cycle check dictionary stores the cheapest path (g-val) found
+        #so far to a state, under its hashable_state (or its exact packed_key
+        #in a CompactClosedList). 
+        if self.compact_closed:
+            self.state_key = lambda state: state.packed_key()
+        else:
+            self.state_key = lambda state: state.hashable_state()
+        if self.cycle_check == _CC_FULL:
+            self.cc_dictionary = CompactClosedList() if self.compact_closed else dict()
+            self.cc_dictionary[self.state_key(initState)] = initState.gval
+
+        self.path_trace = TraceStore(initState) if self.trace_store else None
+
+        #depth first path checking keeps the (state, key) pairs of the path
+        #to the node being expanded, and the set of their keys, so that a
+        #successor is checked against its path without walking its ancestors
+        if self.strategy == _DEPTH_FIRST and self.cycle_check == _CC_PATH:
+            self.path_states = []
+            self.path_keys = set()
+        else:
+            self.path_states = self.path_keys = None
+        
+        self.open.insert(node)
+        self.fval_function = fval_function
+        self.goal_fn = goal_fn
+        self.heur_fn = heur_fn
+        self._profile_setup()
+
+    def search(self, timebound=None, costbound=None):
+        """
+        Start searching, using the parameters set by init_search.
+
+        @param timebound: the maximum amount of (wall clock) time, in seconds, to spend on this search.
+        @param costbound: the cost bound 3-tuple for pruning, as specified in the assignment.
+        """
+
+        goal_node = []
+
+        ###NOW do the search and return the result
+        clock_start = time.perf_counter()
+        self.deadline = Deadline(timebound, self.cancel_token)
+        self.exhausted = False
+        if self.strategy in (_IDASTAR, _SMASTAR):
+            goal_node = self._searchBounded(costbound)
+        else:
+            goal_node = self._searchOpen(self.goal_fn, self.heur_fn, self.fval_function, costbound)
+        self._finish_stats(clock_start)
+
+        if goal_node:
+            total_search_time = self.deadline.elapsed()
+            #print("Solution Found with cost of {} in search time of {} sec".format(goal_node.gval, total_search_time))
+            #print("Search stats:", self.stats.to_json())
+            return goal_node.state
+        else:
+            #exited the while without finding goal---search failed
+            total_search_time = self.deadline.elapsed()
+            #print("Search Failed! No solution found.")
+            #print("Search stats:", self.stats.to_json())
+            return False
+
+    def ara_search(self, timebound=None, weights=(1,), costbound=None, on_solution=None):
+        """
+        Anytime repairing astar, using the parameters set by init_search (the
+        engine must use the 'ara' strategy). Runs a sequence of weighted astar
+        searches that share one OPEN list and cycle check dictionary. After
+        each solution the weight is lowered to the next value of the schedule,
+        the INCONS nodes are moved back to OPEN and OPEN is re-ordered under
+        the new weight, dropping the nodes whose gval+hval exceeds the cost
+        of the best solution found so far.
+
+        @param timebound: the maximum amount of (wall clock) time, in seconds, to spend over all iterations.
+        @param weights: the non-increasing weight schedule. The last weight is kept once
+                        the schedule is exhausted.
+        @param costbound: the cost bound 3-tuple for pruning, as specified in the assignment.
+        @param on_solution: optional function called with every improving goal state as soon as it is found.
+        @return: the cheapest goal state found, or False. Every improving solution
+                 is also kept, in order, in self.ara_solutions.
+
+        When OPEN runs out before the time bound the search is not over: the
+        weight is lowered (to 1 once the schedule is exhausted) and INCONS
+        is merged into OPEN again. The search only ends early when OPEN and
+        INCONS are both empty at weight 1; self.exhausted is then set, and
+        with an admissible heuristic the solution returned is optimal (no
+        solution cheaper than costbound exists if it is False).
+        """
+
+        clock_start = time.perf_counter()
+        self.ara_solutions = []
+        best = False
+        schedule = list(weights)
+        self.weight = schedule.pop(0)
+        self.open.reorder()
+
+        self.deadline = Deadline(timebound, self.cancel_token)
+        self.exhausted = False
+
+        while True:
+            goal_node = self._searchOpen(self.goal_fn, self.heur_fn, self.fval_function, costbound)
+            if not goal_node:
+                if self.deadline.done:
+                    #out of time (or cancelled)
+                    self.exhausted = False
+                    break
+                if self.weight <= 1 and not self.ara_incons:
+                    #OPEN exhausted at weight 1: no cheaper solution
+                    self.exhausted = True
+                    break
+                #OPEN exhausted at this weight: go on with a lower one
+                #BEGIN TRACING
+                if self.trace:
+                    print("   TRACE: ARA OPEN exhausted at weight {}".format(self.weight))
+                #END TRACING
+                self.weight = schedule.pop(0) if schedule else 1
+                self._ara_repair()
+                continue
+
+            if goal_node.gval < self.ara_incumbent:
+                best = goal_node.state
+                self.ara_solutions.append(best)
+                self.ara_incumbent = goal_node.gval
+                if on_solution is not None:
+                    on_solution(best)
+
+            #BEGIN TRACING
+            if self.trace:
+                print("   TRACE: ARA solution with cost {} at weight {}".format(goal_node.gval, self.weight))
+            #END TRACING
+
+            if schedule:
+                self.weight = schedule.pop(0)
+            self._ara_repair()
+
+        self._finish_stats(clock_start)
+        return best
+
+    def bidirectional_search(self, initState, goal_fn, reverse_states, meet_key, join,
+                             heur_fn=_zero_hfn, reverse_heur_fn=_zero_hfn, timebound=None, step=1):
+        """
+        Bidirectional search: a forward search from initState and a reverse
+        search from reverse_states (states of a reverse state space, e.g., the
+        goal configurations) run with the strategy and cycle checking of this
+        engine. In turn, the side with the smaller OPEN expands step nodes.
+        Every state a side extracts is recorded under meet_key(state); once a
+        side extracts a state whose key the other side recorded, join builds
+        the goal state of the joined path.
+
+        @param initState: the initial state of the forward search.
+        @param goal_fn: the goal function of the forward search (a forward goal reached
+                        before the searches meet is returned as is).
+        @param reverse_states: the start states of the reverse search.
+        @param meet_key: function mapping a forward or a reverse state to its meet key. States
+                         with the same key must be joinable, e.g., the packed state hash
+                         normalised for whatever a reverse goal leaves open.
+        @param join: function (forward state, reverse state) returning the goal state of the
+                     joined path, or False if the two cannot be joined.
+        @param heur_fn: the heuristic function of the forward search.
+        @param reverse_heur_fn: the heuristic function of the reverse search.
+        @param timebound: the maximum amount of (wall clock) time, in seconds, to spend on the search.
+        @param step: the number of expansions of a side per turn.
+        @return: the goal state of the first path found, or False. The reverse
+                 engine (and its stats) is kept in self.reverse_engine.
+        """
+        if self.strategy in (_ARA, _IDASTAR, _SMASTAR):
+            print('Bidirectional search needs one of the OPEN based search strategies')
+            return False
+        reverse_states = list(reverse_states)
+        if not reverse_states:
+            return False
+
+        found = []
+        forward_seen = dict()
+        reverse_seen = dict()
+
+        def meets(state, seen, other_seen, joined):
+            key = meet_key(state)
+            if key not in seen or state.gval < seen[key].gval:
+                seen[key] = state
+            other = other_seen.get(key)
+            if other is not None:
+                goal = joined(state, other)
+                if goal:
+                    found.append(goal)
+                    return True
+            return False
+
+        def forward_goal(state):
+            if goal_fn(state):
+                found.append(state)
+                return True
+            return meets(state, forward_seen, reverse_seen, join)
+
+        def reverse_goal(state):
+            return meets(state, reverse_seen, forward_seen, lambda state, other: join(other, state))
+
+        reverse = self.reverse_engine = copy.copy(self)
+        self.init_search(initState, forward_goal, heur_fn)
+        reverse.init_search(reverse_states[0], reverse_goal, reverse_heur_fn)
+        for state in reverse_states[1:]:
+            reverse.open.insert(sNode(state, reverse_heur_fn(state), reverse.fval_function))
+            if reverse.cycle_check == _CC_FULL:
+                reverse.cc_dictionary[reverse.state_key(state)] = state.gval
+
+        self.deadline = reverse.deadline = Deadline(timebound, self.cancel_token)
+
+        clock_start = time.perf_counter()
+        while not found:
+            if self.deadline.done:
+                break
+            if self.open.empty() or reverse.open.empty():
+                #one side has exhausted its search space without meeting the other
+                break
+            side = self if len(self.open) <= len(reverse.open) else reverse
+            side._searchOpen(side.goal_fn, side.heur_fn, side.fval_function, None, step)
+
+        self._finish_stats(clock_start)
+        reverse._finish_stats(clock_start)
+        return found[0] if found else False
+
+    def _ara_fval_function(self, node):
+        '''default fval function for anytime repairing astar'''
+        return node.gval + self.weight*node.hval
+
+    def _ara_repair(self):
+        '''Start a new iteration of anytime repairing astar: merge INCONS into
+           OPEN and re-order OPEN under the current weight, keeping only
+           the up to date nodes that are still inside the cost bound.'''
+        incons = self.ara_incons.values()
+        self.ara_incons = dict()
+        self.ara_closed = set()
+        self.open.reorder(lambda node: node.gval + node.hval <= self.ara_incumbent and
+                          self.cc_dictionary[self.state_key(node.state)] == node.gval,
+                          incons)
+
+    def _searchOpen(self, goal_fn, heur_fn, fval_function, costbound, max_expansions=None):
+        """
+        Search, starting from self.open.
+
+        @param goal_fn: the goal function.
+        @param heur_fn: the heuristic function.
+        @param fval_function: the f-value function (only relevant when using a custom search strategy).
+        @param costbound: the cost bound 3-tuple, as described in the assignment.
+        @param max_expansions: if given, stop (returning False, with OPEN kept) once this many
+                               nodes were taken off OPEN without reaching a goal.
+        """
+
+        #BEGIN TRACING
+        if self.trace:
+            print("   TRACE: Initial OPEN: ", self.open.print_open())
+            if self.cycle_check == _CC_FULL:
+                print("   TRACE: Initial CC_Dict:", self.cc_dictionary)
+        #END TRACING
+        state_key = self.state_key
+        while not self.open.empty():
+            if max_expansions is not None:
+                if max_expansions == 0:
+                    return False
+                max_expansions = max_expansions - 1
+            node = self.open.extract()
+
+            #BEGIN TRACING
+            if self.trace:
+                print("   TRACE: Next State to expand: <S{}:{}:{}, g={}, h={}, f=g+h={}>".format(
+                    node.state.index, node.state.action, node.state.hashable_state(), node.gval, node.hval, node.gval + node.hval))
+                if node.state.gval != node.gval:
+                    print("ERROR: Node gval not equal to state gval!")
+            #END TRACING
+                        
+            if goal_fn(node.state):
+              #node at front of OPEN is a goal...search is completed.
+              return node
+
+            if self.deadline.expired(): #timebound check
+                #exceeded time bound (or cancelled), must terminate search
+                print("TRACE: Search has exceeeded the time bound provided.")
+                return False
+
+             #All states reached by a search node on OPEN have already
+             #been hashed into the self.cc_dictionary. However,
+             #before expanding a node we might have already expanded
+             #an equivalent state with lower g-value. So only expand
+             #the node if the hashed g-value is no greater than the
+             #node's current g-value. 
+
+            #BEGIN TRACING
+            if self.trace:
+                if self.cycle_check == _CC_FULL: print("   TRACE: CC_dict gval={}, node.gval={}".format(
+                    self.cc_dictionary[state_key(node.state)], node.gval))
+            #END TRACING
+
+            if self.cycle_check == _CC_FULL and self.cc_dictionary[state_key(node.state)] < node.gval:
+                self.stats.stale_pops = self.stats.stale_pops + 1
+                continue
+
+            if self.strategy == _ARA:
+                #a node with the same gval was already expanded in this iteration
+                if state_key(node.state) in self.ara_closed:
+                    self.stats.stale_pops = self.stats.stale_pops + 1
+                    continue
+                self.ara_closed.add(state_key(node.state))
+
+            path_keys = self.path_keys
+            if path_keys is not None:
+                #OPEN is a stack, so the path to node is the path to the last
+                #node expanded unwound back to the parent of node
+                path_states = self.path_states
+                while path_states and path_states[-1][0] is not node.state.parent:
+                    path_keys.discard(path_states.pop()[1])
+                path_states.append((node.state, state_key(node.state)))
+                path_keys.add(path_states[-1][1])
+            elif self.cycle_check == _CC_PATH:
+                #the other strategies have no single current path: each node
+                #carries the keys of its path, one set shared by its children
+                path_keys = node.path_keys | {state_key(node.state)}
+
+            successors = self._expand(node)
+
+            #First drop the successors pruned by cycle checking or the pruning stages,
+            #then compute the heuristic values of the others (in one batch if possible)
+            survivors = []
+            positions = []
+            for position, succ in enumerate(successors):
+                hash_state = state_key(succ)
+
+                #BEGIN TRACING
+                if self.trace > 1:
+                    print("   TRACE: Successor State:", end="")
+                    succ.print_state()
+
+                    if self.cycle_check == _CC_FULL and hash_state in self.cc_dictionary:
+                        print("   TRACE: Already in CC_dict, CC_dict gval={}, successor state gval={}".format(
+                            self.cc_dictionary[hash_state], succ.gval))
+
+                    if self.cycle_check == _CC_PATH and succ.has_path_cycle(path_keys):
+                        print("   TRACE: On cyclic path")
+                #END TRACING
+
+                #one probe of the closed list (costly for a CompactClosedList)
+                known_gval = self.cc_dictionary.get(hash_state) if self.cycle_check == _CC_FULL else None
+                prune_succ = (known_gval is not None and
+                              (succ.gval > known_gval or
+                               (self.strategy == _ARA and succ.gval == known_gval))
+                             ) or (
+                              self.cycle_check == _CC_PATH and
+                              succ.has_path_cycle(path_keys)
+                             )
+
+                if prune_succ :
+                    self.stats.cycle_check_pruned = self.stats.cycle_check_pruned + 1
+                    #BEGIN TRACING
+                    if self.trace > 1:
+                        print(" TRACE: Successor State pruned by cycle checking")
+                        print("\n")                        
+                    #END TRACING
+                    continue
+
+                if self.pruning_stages and self._stage_prunes(succ):
+                    #BEGIN TRACING
+                    if self.trace > 1:
+                        print(" TRACE: Successor State pruned by a pruning stage")
+                        print("\n")
+                    #END TRACING
+                    continue
+
+                survivors.append((succ, hash_state))
+                positions.append(position)
+
+            if self.batch_heur_fn is not None:
+                hvals = self.batch_heur_fn([succ for succ, hash_state in survivors]) if survivors else []
+            else:
+                hvals = [heur_fn(succ) for succ, hash_state in survivors]
+
+            #BEGIN TRACING
+            if self.trace:
+                #the heuristic values of the scoring pass (none for the pruned successors)
+                scored = dict(zip(positions, hvals))
+                print("   TRACE: Expanding Node. Successors = {", end="")
+                for position, ss in enumerate(successors):
+                    if position in scored:
+                        ss_hval = scored[position]
+                        print("<S{}:{}:{}, g={}, h={}, f=g+h={}>, ".format(
+                            ss.index, ss.action, ss.hashable_state(), ss.gval, ss_hval, ss.gval+ss_hval), end="")
+                    else:
+                        print("<S{}:{}:{}, g={}, pruned>, ".format(
+                            ss.index, ss.action, ss.hashable_state(), ss.gval), end="")
+                print("}")
+            #END TRACING
+
+            for (succ, hash_state), succ_hval, position in zip(survivors, hvals, positions):
+                #BEGIN TRACING
+                if self.trace > 1:
+                    print("   TRACE: Successor S{} Heuristic Value: {}".format(succ.index, succ_hval))
+                #END TRACING
+
+                if costbound is not None and (succ.gval > costbound[0] or
+                                              succ_hval > costbound[1] or
+                                              succ.gval + succ_hval > costbound[2]) : 
+                    self.stats.cost_bound_pruned = self.stats.cost_bound_pruned + 1
+                    if self.trace > 1:
+                      print(" TRACE: Successor State pruned, over current cost bound of {}", costbound)
+                      print("\n") 
+                    continue                    
+
+                if self.strategy == _ARA and succ.gval + succ_hval > self.ara_incumbent:
+                    #over the cost of the best solution found so far
+                    self.stats.cost_bound_pruned = self.stats.cost_bound_pruned + 1
+                    continue
+
+                #passed all cycle checks and costbound checks ...add to open
+                if self.path_trace is not None:
+                    self.path_trace.adopt(succ, node.state, position)
+                if self.strategy == _ARA and hash_state in self.ara_closed:
+                    #already expanded in this iteration, defer to the next one
+                    self.ara_incons[hash_state] = sNode(succ, succ_hval, node.fval_function)
+                else:
+                    succ_node = sNode(succ, succ_hval, node.fval_function)
+                    if self.cycle_check == _CC_PATH and self.path_keys is None:
+                        succ_node.path_keys = path_keys
+                    self.open.insert(succ_node)
+
+                #BEGIN TRACING
+                if self.trace > 1:
+                    print(" TRACE: Successor State added to OPEN")
+                    print("\n")
+                #END TRACING
+
+                #record cost of this path in dictionary.
+                if self.cycle_check == _CC_FULL:
+                    self.cc_dictionary[hash_state] = succ.gval
+
+            if len(self.open) > self.stats.frontier_peak:
+                self.stats.frontier_peak = len(self.open)
+            if self.cycle_check == _CC_FULL and len(self.cc_dictionary) > self.stats.closed_peak:
+                self.stats.closed_peak = len(self.cc_dictionary)
+
+        #end of while--OPEN is empty and no solution
+        self.exhausted = True
+        return False
+
+    def _searchBounded(self, costbound):
+        """
+        Resume the memory-bounded search (idastar or smastar) set up by
+        init_search until it reaches the next goal.
+
+        @param costbound: the cost bound 3-tuple, as described in the assignment.
+        """
+        self.costbound = costbound
+        try:
+            goal_node = next(self.bounded_search)
+        except StopIteration:
+            #search space exhausted
+            goal_node = False
+        return goal_node or False
+
+    def _timed_out(self):
+        '''Check the timebound of the current call to search'''
+        if self.deadline.expired():
+            print("TRACE: Search has exceeeded the time bound provided.")
+            return True
+        return False
+
+    def _bounded_children(self, node, path):
+        """
+        Generate the search nodes of the successors of node for the
+        memory-bounded strategies, dropping those pruned by path checking,
+        the pruning stages or the cost bound.
+
+        @param node: the sNode to expand.
+        @param path: the set of hashable states on the path to node (used by
+                     idastar), or None for node.path_keys with node added (the
+                     path_keys of the children, used by smastar).
+        @return: list of (sNode, hashable state) pairs.
+        """
+        shared = path is None and self.cycle_check == _CC_PATH
+        if shared:
+            path = node.path_keys | {node.state.hashable_state()}
+        survivors = []
+        for succ in self._expand(node):
+            hash_state = succ.hashable_state()
+            if self.cycle_check == _CC_PATH and succ.has_path_cycle(path):
+                self.stats.cycle_check_pruned = self.stats.cycle_check_pruned + 1
+                continue
+            if self.pruning_stages and self._stage_prunes(succ):
+                continue
+            survivors.append((succ, hash_state))
+
+        if self.batch_heur_fn is not None:
+            hvals = self.batch_heur_fn([succ for succ, hash_state in survivors]) if survivors else []
+        else:
+            hvals = [self.heur_fn(succ) for succ, hash_state in survivors]
+
+        children = []
+        costbound = self.costbound
+        for (succ, hash_state), succ_hval in zip(survivors, hvals):
+            if costbound is not None and (succ.gval > costbound[0] or
+                                          succ_hval > costbound[1] or
+                                          succ.gval + succ_hval > costbound[2]) :
+                self.stats.cost_bound_pruned = self.stats.cost_bound_pruned + 1
+                continue
+            child = sNode(succ, succ_hval, node.fval_function)
+            if shared:
+                child.path_keys = path
+            children.append((child, hash_state))
+        return children
+
+    def _idastar(self, root):
+        """
+        Iterative deepening astar as a generator: yields every goal node it
+        reaches (so that search can be resumed with a tighter cost bound),
+        or None when the timebound of the current call to search runs out.
+
+        Each iteration is a depth first search of the nodes whose fval does
+        not exceed the threshold, which starts at the fval of the root and is
+        raised to the smallest fval cut off by the previous iteration. A
+        transposition table of at most self.node_limit states remembers the
+        smallest gval each state was reached with during the iteration, so
+        that the subtrees below states reached again at no lower gval are
+        not searched twice.
+        """
+        threshold = root.fval_function(root)
+        while True:
+            next_threshold = float('inf')
+            root_hash = root.state.hashable_state()
+            transpositions = {root_hash: root.gval}
+            path = set([root_hash]) if self.cycle_check == _CC_PATH else None
+            #stack of [sNode, hashable state, unexplored children or None]
+            stack = [[root, root_hash, None]]
+            while stack:
+                entry = stack[-1]
+                node = entry[0]
+                if entry[2] is None:
+                    if self.goal_fn(node.state):
+                        yield node
+                        entry[2] = []
+                    else:
+                        while self._timed_out():
+                            yield None
+                        #BEGIN TRACING
+                        if self.trace:
+                            print("   TRACE: Next State to expand: <S{}:{}:{}, g={}, h={}, threshold={}>".format(
+                                node.state.index, node.state.action, entry[1], node.gval, node.hval, threshold))
+                        #END TRACING
+                        children = []
+                        for child, hash_state in self._bounded_children(node, path):
+                            if transpositions.get(hash_state, child.gval + 1) <= child.gval:
+                                self.stats.cycle_check_pruned = self.stats.cycle_check_pruned + 1
+                                continue
+                            fval = child.fval_function(child)
+                            if fval > threshold:
+                                if fval < next_threshold:
+                                    next_threshold = fval
+                                continue
+                            children.append((fval, -child.gval, child.index, child, hash_state))
+                        #explore the most promising child first
+                        children.sort(reverse=True)
+                        entry[2] = children
+
+                if entry[2]:
+                    fval, neg_gval, index, child, hash_state = entry[2].pop()
+                    if hash_state in transpositions or len(transpositions) < self.node_limit:
+                        transpositions[hash_state] = child.gval
+                    if len(transpositions) > self.stats.closed_peak:
+                        self.stats.closed_peak = len(transpositions)
+                    if path is not None:
+                        path.add(hash_state)
+                    stack.append([child, hash_state, None])
+                    if len(stack) > self.stats.frontier_peak:
+                        self.stats.frontier_peak = len(stack)
+                else:
+                    stack.pop()
+                    if path is not None:
+                        path.discard(entry[1])
+
+            if next_threshold == float('inf'):
+                #nothing was cut off: the search space is exhausted
+                return
+            #BEGIN TRACING
+            if self.trace:
+                print("   TRACE: IDA* threshold raised to", next_threshold)
+            #END TRACING
+            threshold = next_threshold
+
+    def _smastar(self, root):
+        """
+        Simplified memory-bounded astar as a generator: yields every goal
+        node it reaches (so that search can be resumed with a tighter cost
+        bound), or None when the timebound of the current call to search
+        runs out.
+
+        The search tree holds at most self.node_limit nodes. OPEN holds its
+        leaves and the interior nodes with evicted children; the best of
+        them (lowest fval, deepest first) is expanded, and when the tree is
+        full the worst leaf (highest fval, shallowest first) is evicted, its
+        fval backed up into the forgotten fval of its parent, which is then
+        kept on OPEN to regenerate its evicted children. The fval of every
+        interior node is kept at the smallest fval below it.
+        """
+        inf = float('inf')
+        limit = max(self.node_limit, 2)
+        counter = itertools.count()
+        best = []
+        worst = []
+        self.sma_nodes = 1
+
+        def open_fval(n):
+            return n.forgotten if n.children else n.fval
+
+        def push(n):
+            #(re)insert n in OPEN under its current key
+            n.version = n.version + 1
+            n.in_open = True
+            fval = open_fval(n)
+            heapq.heappush(best, (fval, -n.depth, next(counter), n.version, n))
+            if not n.children:
+                heapq.heappush(worst, (-fval, n.depth, next(counter), n.version, n))
+            if len(best) > 4*self.sma_nodes + 64:
+                #too many stale entries: drop them
+                best[:] = [e for e in best if e[4].in_open and e[4].version == e[3]]
+                heapq.heapify(best)
+                worst[:] = [e for e in worst if e[4].in_open and e[4].version == e[3] and not e[4].children]
+                heapq.heapify(worst)
+
+        def pop(heap, leaves_only):
+            while heap:
+                entry = heapq.heappop(heap)
+                n = entry[4]
+                if n.in_open and n.version == entry[3] and not (leaves_only and n.children):
+                    n.in_open = False
+                    return n
+            return None
+
+        def detach(n):
+            #remove the leaf n from the tree, remembering its fval in its parent
+            parent = n.parent
+            self.sma_nodes = self.sma_nodes - 1
+            if parent is None:
+                return
+            parent.children.remove(n)
+            if n.fval < parent.forgotten:
+                parent.forgotten = n.fval
+            if parent.expanding:
+                return
+            if not parent.children:
+                parent.fval = parent.forgotten
+                if parent.fval == inf:
+                    detach(parent)
+                    return
+            backup(parent)
+            if parent.forgotten < inf:
+                push(parent)
+
+        def backup(n):
+            #propagate the smallest fval below n up the tree
+            while n is not None and n.children:
+                fval = min(min(c.fval for c in n.children), n.forgotten)
+                if fval == n.fval:
+                    break
+                n.fval = fval
+                n = n.parent
+
+        root.fval = root.fval_function(root)
+        push(root)
+        while True:
+            node = pop(best, False)
+            if node is None or open_fval(node) == inf:
+                #nothing left within reach
+                return
+            if self.goal_fn(node.state):
+                yield node
+                if node is root:
+                    return
+                #on resumption, look for another (cheaper) goal
+                node.fval = inf
+                detach(node)
+                continue
+            while self._timed_out():
+                yield None
+
+            #BEGIN TRACING
+            if self.trace:
+                print("   TRACE: Next State to expand: <S{}:{}:{}, g={}, h={}, f={}>".format(
+                    node.state.index, node.state.action, node.state.hashable_state(), node.gval, node.hval, open_fval(node)))
+            #END TRACING
+
+            #regenerate the successors that are not in the tree
+            present = set(c.state.hashable_state() for c in node.children)
+            node.expanding = True
+            node.forgotten = inf
+            for child, hash_state in self._bounded_children(node, None):
+                if hash_state in present:
+                    continue
+                child = SMANode(child, node)
+                if child.depth >= limit - 1 and not self.goal_fn(child.state):
+                    #no room below this child for a path to a goal
+                    child.fval = inf
+                else:
+                    #pathmax: a child is no better than its parent
+                    child.fval = max(node.fval, child.fval_function(child))
+                while self.sma_nodes >= limit:
+                    victim = pop(worst, True)
+                    if victim is None:
+                        break
+                    detach(victim)
+                if self.sma_nodes >= limit:
+                    #nothing left to evict: forget the new child instead
+                    if child.fval < node.forgotten:
+                        node.forgotten = child.fval
+                    continue
+                node.children.append(child)
+                self.sma_nodes = self.sma_nodes + 1
+                push(child)
+            node.expanding = False
+
+            if node.children:
+                node.fval = inf
+                backup(node)
+                if node.forgotten < inf:
+                    push(node)
+            else:
+                node.fval = node.forgotten
+                if node.fval == inf:
+                    if node is root:
+                        return
+                    detach(node)
+                else:
+                    push(node)
+            if self.sma_nodes > self.stats.frontier_peak:
+                self.stats.frontier_peak = self.sma_nodes
+
+    def _stage_prunes(self, state):
+        '''Run the pruning stages on state, counting the stage that prunes it'''
+        for i, stage in enumerate(self.pruning_stages):
+            if stage(state):
+                self.stats.stage_pruned[i] = self.stats.stage_pruned[i] + 1
+                return True
+        return False
+            
@@ -0,0 +1,1388 @@
+'''Sokoban routines.
+
+    A) Class SokobanState
+
+    A specializion of the StateSpace Class that is tailored to the game of Sokoban.
+
+    B) Class PackedSokobanState
+
+    A compact version of SokobanState. Cells are integer indices y*width+x,
+    the boxes are an integer bitboard and the static part of the problem is
+    shared through a SokobanLevel object. Its subclass PullSokobanState is
+    the reverse search space, in which robots pull boxes off the storage
+    points (see SearchEngine.bidirectional_search), and its subclass
+    PushSokobanState the push-level search space, in which every action
+    walks a robot to a box and pushes it.
+
+    C) class Direction
+
+    An encoding of the directions of movement that are possible for robots in Sokoban.
+
+    Code also contains a list of 40 Sokoban problems for the purpose of testing.
+'''
+
+from search import *
+from array import array
+from collections import deque, OrderedDict
+import functools
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class SokobanState(StateSpace):
+
+    #Set to True to drop the successors that push a box onto a dead square
+    #(see SokobanLevel.dead_mask) instead of returning them.
+    prune_dead_squares = False
+
+    #Set to True for operator decomposition: the robots take turns in a fixed
+    #round-robin order, one robot per ply, and a robot may pass its turn (at no
+    #cost) unless all the others just passed theirs. A state in which not every
+    #robot had its turn yet is an intermediate state, keyed apart from the full
+    #states (see hashable_state).
+    decompose_moves = False
+
+    #Set to True for partial order reduction: a move is dropped when it does not
+    #touch the cells of the last move and is made by a robot with a lower index
+    #(the same moves in the other order reach the same state at the same cost).
+    #Ignored with decompose_moves.
+    partial_order_reduction = False
+
+    #The location the last action pushed a box to, None if it pushed no box.
+    moved_box = None
+
+    #Under decompose_moves: the robot whose turn it is, and the number of robots that passed in a row.
+    turn = 0
+    passes = 0
+
+    #Under partial_order_reduction: the robot of the last action and the cells it touched.
+    last_move = None
+
+    #The SokobanLevel of the state (passed on to its successors, see static_level)
+    #and its packed_key, once computed.
+    _level = None
+    _packed_key = None
+
+    def __init__(self, action, gval, parent, width, height, robots, boxes, storage, obstacles):
+        '''
+        Creates a new Sokoban state.
+        @param width: The room's X dimension (excluding walls).
+        @param height: The room's Y dimension (excluding walls).
+        @param robots: A tuple of all the robots' locations. Each robot is denoted by its index in the list.
+        @param boxes: A frozenset of all the boxes.
+        @param storage: A frozenset of all the storage points.
+        @param obstacles: A frozenset of all the impassable obstacles.
+        '''
+        StateSpace.__init__(self, action, gval, parent)
+        self.width = width
+        self.height = height
+        self.robots = robots
+        self.boxes = boxes
+        self.storage = storage
+        self.obstacles = obstacles    
+
+    def successors(self):
+        '''
+        Generates all the actions that can be performed from this state, and the states those actions will create.        
+        '''
+        successors = []
+        transition_cost = 1
+        moved_boxes = frozenset()
+        dead = frozenset()
+        if self.prune_dead_squares:
+            dead = self.static_level().dead_squares
+
+        zobrist = self.zobrist_hash()
+        #once the packed key of self is known (the search keeps a CompactClosedList)
+        #the keys of the successors are updated like the zobrist hash
+        packed = self._packed_key
+        if packed is not None:
+            level = self._level
+            turn_shift = len(self.robots)*level.cell_bits + level.size
+            turn_bits = len(self.robots).bit_length()
+            packed ^= ((self.turn << turn_bits) | self.passes) << turn_shift
+        robots = range(0, len(self.robots))
+        last_move = None
+        if self.decompose_moves:
+            robots = (self.turn,)
+        elif self.partial_order_reduction:
+            last_move = self.last_move
+
+        for robot in robots:
+          for direction in (UP, RIGHT, DOWN, LEFT):
+              new_location = direction.move(self.robots[robot])
+              new_robots = list(self.robots);
+              new_robots.remove(self.robots[robot])
+              new_robots = tuple(new_robots)
+              new_boxes = set(self.boxes)
+              new_moved_boxes = set(moved_boxes)
+              
+              if new_location[0] < 0 or new_location[0] >= self.width:
+                  continue
+              if new_location[1] < 0 or new_location[1] >= self.height:
+                  continue
+              if new_location in self.obstacles:
+                  continue
+              if new_location in new_robots:
+                  continue
+              if new_location in moved_boxes:
+                  continue
+              
+              if new_location in self.boxes:
+                  new_box_location = direction.move(new_location)
+                  
+                  if new_box_location[0] < 0 or new_box_location[0] >= self.width:
+                      continue
+                  if new_box_location[1] < 0 or new_box_location[1] >= self.height:
+                      continue
+                  if new_box_location in self.obstacles:
+                      continue
+                  if new_box_location in new_robots:
+                      continue
+                  if new_box_location in new_boxes:
+                      continue
+                  if new_box_location in dead:
+                      continue
+                  
+                  new_boxes.remove(new_location)
+                  new_boxes.add(new_box_location)
+                  new_moved_boxes.add(new_box_location)
+              
+              if self.partial_order_reduction:
+                  touched = (self.robots[robot], new_location) + ((new_box_location,) if new_moved_boxes else ())
+                  if last_move is not None and robot < last_move[0] and last_move[1].isdisjoint(touched):
+                      continue
+
+              new_robots = list(self.robots)
+              new_robots[robot] = new_location
+              new_robots = tuple(new_robots)
+
+              new_state = SokobanState(str(robot) + " " + direction.name, self.gval + transition_cost, self, self.width, self.height, new_robots, frozenset(new_boxes), self.storage, self.obstacles)
+              #the hash of the successor is that of self with the robot (and box) moved
+              new_state.zobrist = zobrist ^ ZOBRIST[(robot, self.robots[robot])] ^ ZOBRIST[(robot, new_location)]
+              new_state._level = self._level
+              if new_moved_boxes:
+                  new_state.moved_box = new_box_location
+                  new_state.zobrist ^= ZOBRIST[new_location] ^ ZOBRIST[new_box_location]
+              if self.decompose_moves:
+                  new_state.turn = (robot + 1) % len(self.robots)
+              elif self.partial_order_reduction:
+                  new_state.last_move = (robot, frozenset(touched))
+              if packed is not None:
+                  #cells are y*width+x, see SokobanLevel.cell
+                  old_cell = self.robots[robot][1]*self.width + self.robots[robot][0]
+                  new_cell = new_location[1]*self.width + new_location[0]
+                  key = packed ^ ((old_cell ^ new_cell) << (level.size + (len(self.robots) - 1 - robot)*level.cell_bits))
+                  if new_moved_boxes:
+                      key ^= (1 << new_cell) ^ (1 << (new_box_location[1]*self.width + new_box_location[0]))
+                  if self.decompose_moves:
+                      key |= (new_state.turn << turn_bits) << turn_shift
+                  new_state._packed_key = key
+              successors.append(new_state)
+
+        if self.decompose_moves and self.passes < len(self.robots) - 1:
+            new_state = SokobanState(str(self.turn) + " " + WAIT, self.gval, self, self.width, self.height, self.robots, self.boxes, self.storage, self.obstacles)
+            new_state.zobrist = zobrist
+            new_state._level = self._level
+            new_state.turn = (self.turn + 1) % len(self.robots)
+            new_state.passes = self.passes + 1
+            if packed is not None:
+                new_state._packed_key = packed | (((new_state.turn << turn_bits) | new_state.passes) << turn_shift)
+            successors.append(new_state)
+
+        return successors
+
+    def hashable_state(self):
+        '''Return a data item that can be used as a dictionary key to UNIQUELY represent a state.'''
+        if self.turn or self.passes:
+            #an intermediate state of operator decomposition
+            return (self.zobrist_hash(), self.turn, self.passes)
+        return self.zobrist_hash()
+
+    def zobrist_features(self):
+        '''The features of a state are its robots, as (robot index, location) pairs, and its box locations.'''
+        return itertools.chain(enumerate(self.robots), self.boxes)
+
+    def packed_key(self):
+        '''Return an integer that UNIQUELY represents a state: the box cells
+           as a bitboard, the robot cells above them (and, under
+           decompose_moves, the turn and the passes in a row above those).'''
+        if self._packed_key is not None:
+            return self._packed_key
+        level = self.static_level()
+        robot_bits = 0
+        for robot in self.robots:
+            robot_bits = (robot_bits << level.cell_bits) | level.cell(robot)
+        key = (robot_bits << level.size) | level.mask(self.boxes)
+        if self.decompose_moves:
+            #turn and passes are both below the number of robots
+            bits = len(self.robots).bit_length()
+            key = (((self.turn << bits) | self.passes) << (len(self.robots)*level.cell_bits + level.size)) | key
+        self._packed_key = key
+        return key
+
+    def static_level(self):
+        '''@return: The SokobanLevel of the static data of the state (looked up once per search).'''
+        if self._level is None:
+            self._level = sokoban_level(self.width, self.height, self.storage, self.obstacles)
+        return self._level
+
+    def state_string(self):
+        '''Returns a string representation fo a state that can be printed to stdout.'''        
+        map = []
+        for y in range(0, self.height):
+            row = []
+            for x in range(0, self.width):
+                row += [' ']
+            map += [row]
+        
+        for storage_point in self.storage:
+            map[storage_point[1]][storage_point[0]] = '.'
+        for obstacle in self.obstacles:
+            map[obstacle[1]][obstacle[0]] = '#'
+        for i, robot in enumerate(self.robots):
+            if robot in self.storage:
+                map[robot[1]][robot[0]] = chr(ord('A') + i)
+            else:
+                map[robot[1]][robot[0]] = chr(ord('a') + i)
+        for box in self.boxes:
+            if box in self.storage:
+                map[box[1]][box[0]] = '*'
+            else:
+                map[box[1]][box[0]] = '$'
+        
+        for y in range(0, self.height):
+            map[y] = ['#'] + map[y]
+            map[y] = map[y] + ['#']
+        map = ['#' * (self.width + 2)] + map
+        map = map + ['#' * (self.width + 2)]
+
+        s = ''
+        for row in map:
+            for char in row:
+                s += char
+            s += '\n'
+
+        return s        
+
+    def print_state(self):
+        '''
+        Prints the string representation of the state. ASCII art FTW!
+        '''        
+        print("ACTION was " + self.action)      
+        print(self.state_string())
+
+    def pack(self):
+        '''Returns the compact (bit-packed) version of this state.'''
+        level = self.static_level()
+        return PackedSokobanState(self.action, self.gval, self.parent, level,
+                                  tuple(level.cell(robot) for robot in self.robots),
+                                  level.mask(self.boxes))
+
+
+class SokobanLevel:
+    '''
+    The static part of a Sokoban problem (dimensions, storage points and
+    obstacles), shared by all the packed states of the problem. A cell (x, y)
+    is encoded as the integer y*width+x and a set of cells as an integer with
+    the bits of its cells set.
+    '''
+
+    def __init__(self, width, height, storage, obstacles):
+        self.width = width
+        self.height = height
+        self.storage = storage
+        self.obstacles = obstacles
+        self.size = width * height
+        self.cell_bits = max(1, (self.size - 1).bit_length())
+        self.coords = tuple((c % width, c // width) for c in range(self.size))
+        self.storage_mask = self.mask(storage)
+        self.obstacle_mask = self.mask(obstacles)
+        self.storage_cells = tuple(sorted(self.cell(s) for s in storage))
+
+        #steps[d][c] is the cell reached from c moving in DIRECTIONS[d], or -1
+        #if that move leaves the room or runs into an obstacle.
+        steps = []
+        for direction in DIRECTIONS:
+            step = []
+            for c in range(self.size):
+                x, y = direction.move(self.coords[c])
+                if 0 <= x < width and 0 <= y < height and (x, y) not in obstacles:
+                    step.append(y * width + x)
+                else:
+                    step.append(-1)
+            steps.append(tuple(step))
+        self.steps = tuple(steps)
+
+        #manhattan distance from every cell to its nearest storage point
+        self.storage_distance = array('H', [
+            min([abs(x - sx) + abs(y - sy) for (sx, sy) in storage]) if storage else 0
+            for (x, y) in self.coords])
+        #1 for the cells that are not storage points, 0 for the others
+        self.off_storage = array('H', [0 if self.storage_mask >> c & 1 else 1 for c in range(self.size)])
+
+        #push_distance[c*len(storage_cells) + i] is the push distance from cell c
+        #to storage_cells[i]; push_row[c] is the same data as a tuple per cell.
+        m = len(self.storage_cells)
+        self.storage_index = dict((t, i) for i, t in enumerate(self.storage_cells))
+        columns = [self._pull_distances(t) for t in self.storage_cells]
+        self.push_distance = array('H', [columns[i][c] for c in range(self.size) for i in range(m)])
+        self.push_row = tuple(tuple(self.push_distance[c*m:(c+1)*m]) for c in range(self.size))
+        #push distance from every cell to its nearest storage point
+        self.nearest_push = array('H', [min(row) if row else 0 for row in self.push_row])
+        self._walk_distance = None
+        self._tunnel_masks = None
+        self._goal_rooms = None
+
+        self.dead_mask = self._dead_squares()
+        self.dead_squares = self.locations(self.dead_mask)
+
+    @property
+    def walk_distance(self):
+        '''
+        The walk distances between all pairs of cells, computed on first use:
+        walk_distance[a*size + b] is the least number of moves a robot needs
+        to get from cell a to cell b in the empty room (UNREACHABLE if it
+        cannot, or if a or b is an obstacle). The table only depends on the
+        obstacles, so levels with the same room share it.
+        '''
+        if self._walk_distance is None:
+            self._walk_distance = walk_distances(self.width, self.height, self.obstacles)
+        return self._walk_distance
+
+    @property
+    def tunnel_masks(self):
+        '''
+        The one-wide corridors of the room, computed on first use:
+        tunnel_masks[d % 2] is the bitboard of the cells a box pushed in
+        DIRECTIONS[d] passes between two walls (obstacles or the edge of the
+        room). The masks only depend on the obstacles, so levels with the same
+        room share them.
+        '''
+        if self._tunnel_masks is None:
+            self._tunnel_masks = tunnel_masks(self.width, self.height, self.obstacles)
+        return self._tunnel_masks
+
+    @property
+    def goal_rooms(self):
+        '''
+        The goal rooms of the level, computed on first use: a dict mapping the
+        entrance cell of every room (a part of the level with at least two
+        storage points that is only reachable through that cell) to a tuple
+        (room, order, prefixes, allowed). room is the bitboard of the room,
+        order its storage cells in the order they are filled (deepest first),
+        prefixes[k] the bitboard of the first k cells of order, and allowed the
+        bitboard of the cells a robot filling the room walks on.
+        '''
+        if self._goal_rooms is None:
+            self._goal_rooms = self._find_goal_rooms()
+        return self._goal_rooms
+
+    def _find_goal_rooms(self):
+        free = [c for c in range(self.size) if not self.obstacle_mask >> c & 1]
+        free_mask = self.mask(self.coords[c] for c in free)
+        candidates = []
+        for entrance in free:
+            blocked = 1 << entrance
+            seen = blocked
+            for c in free:
+                if seen >> c & 1:
+                    continue
+                room = self.reachable(c, blocked)
+                seen |= room
+                rest = free_mask & ~room & ~blocked
+                storage = room & self.storage_mask
+                size = bin(room).count("1")
+                if bin(storage).count("1") >= 2 and size <= bin(rest).count("1"):
+                    candidates.append((size, entrance, room))
+        rooms = dict()
+        taken = 0
+        for count, entrance, room in sorted(candidates):
+            if room & taken or (1 << entrance) & taken or entrance in rooms:
+                continue
+            taken |= room
+            depth = self.walks(entrance, ~(room | (1 << entrance)) & ((1 << self.size) - 1))
+            order = tuple(sorted(bit_cells(room & self.storage_mask), key=lambda c: (-depth.get(c, 0), c)))
+            prefixes = [0]
+            for c in order:
+                prefixes.append(prefixes[-1] | (1 << c))
+            allowed = room | (1 << entrance)
+            for step in self.steps:
+                if step[entrance] >= 0:
+                    allowed |= 1 << step[entrance]
+            rooms[entrance] = (room, order, tuple(prefixes), allowed)
+        return rooms
+
+    def push_path(self, box, robot, target, blocked, allowed):
+        '''
+        Breadth first search for the shortest sequence of moves of one robot
+        at robot that pushes the box at box to target, with both staying on
+        the cells of the allowed bitboard and off those of the blocked one.
+        @return: A list of direction indices, or None if there is none.
+        '''
+        start = (box, robot)
+        parents = {start: None}
+        frontier = deque([start])
+        while frontier:
+            position = frontier.popleft()
+            if position[0] == target:
+                moves = []
+                while parents[position] is not None:
+                    position, d = parents[position]
+                    moves.append(d)
+                moves.reverse()
+                return moves
+            box, robot = position
+            for d in range(0, 4):
+                new_robot = self.steps[d][robot]
+                if new_robot < 0 or not allowed >> new_robot & 1 or blocked >> new_robot & 1:
+                    continue
+                new_box = box
+                if new_robot == box:
+                    new_box = self.steps[d][box]
+                    if new_box < 0 or not allowed >> new_box & 1 or blocked >> new_box & 1:
+                        continue
+                new_position = (new_box, new_robot)
+                if new_position not in parents:
+                    parents[new_position] = (position, d)
+                    frontier.append(new_position)
+        return None
+
+    def _pull_distances(self, target):
+        '''
+        Computes the push distance from every cell to target: the least number
+        of pushes that take a box from the cell to target in the empty room
+        (no other boxes or robots). The box is pulled backwards from target: a
+        box at cell t can have been pushed there from p (one step back) if the
+        robot could stand at the cell behind p.
+        @return: A list of distances indexed by cell, UNREACHABLE where no pull reaches.
+        '''
+        distance = [UNREACHABLE] * self.size
+        distance[target] = 0
+        frontier = [target]
+        while frontier:
+            next_frontier = []
+            for t in frontier:
+                for d in range(0, 4):
+                    back = self.steps[(d + 2) % 4]
+                    p = back[t]
+                    if p >= 0 and distance[p] == UNREACHABLE and back[p] >= 0:
+                        distance[p] = distance[t] + 1
+                        next_frontier.append(p)
+            frontier = next_frontier
+        return distance
+
+    def _dead_squares(self):
+        '''
+        Finds the cells from which a box can never be pushed onto a storage
+        point, whatever the other boxes and robots do: the free cells whose
+        push distance to every storage point is UNREACHABLE.
+        @return: The bitboard of the dead cells.
+        '''
+        dead = 0
+        for c in range(self.size):
+            if not self.obstacle_mask >> c & 1 and min(self.push_row[c] or (UNREACHABLE,)) == UNREACHABLE:
+                dead |= 1 << c
+        return dead
+
+    def freeze_deadlock(self, boxes, cell):
+        '''
+        Checks the box at cell, given the bitboard of all the boxes, for a
+        freeze deadlock: the box can never be pushed again along either axis
+        (because of walls, dead squares on both sides, or other boxes that
+        are frozen themselves) while it, or a box it is frozen with, is not
+        on storage.
+        @return: True if there is a freeze deadlock at cell.
+        '''
+        group = self._frozen(boxes, cell, set())
+        return group is not None and any(not self.storage_mask >> c & 1 for c in group)
+
+    def _frozen(self, boxes, cell, path):
+        '''
+        @return: The cells of the boxes found frozen together with the box at
+        cell (which is first), or None if it can still move. Boxes on path,
+        the chain of boxes being checked, count as walls.
+        '''
+        path.add(cell)
+        group = [cell]
+        for (a, b) in ((self.steps[0][cell], self.steps[2][cell]), (self.steps[1][cell], self.steps[3][cell])):
+            if a < 0 or b < 0:
+                continue  #wall on one side
+            if self.dead_mask >> a & 1 and self.dead_mask >> b & 1:
+                continue  #dead squares on both sides
+            blocked = False
+            for n in (a, b):
+                if boxes >> n & 1:
+                    if n in path:
+                        blocked = True
+                        break
+                    sub = self._frozen(boxes, n, path)
+                    if sub is not None:
+                        group.extend(sub)
+                        blocked = True
+                        break
+            if not blocked:
+                path.discard(cell)
+                return None
+        path.discard(cell)
+        return group
+
+    def block_deadlock(self, boxes, cell):
+        '''
+        @return: True if the box at cell is part of a 2x2 square filled with
+        boxes, obstacles and walls holding at least one box not on storage.
+        '''
+        x, y = self.coords[cell]
+        for dx in (-1, 1):
+            for dy in (-1, 1):
+                square = ((x, y), (x + dx, y), (x, y + dy), (x + dx, y + dy))
+                off_storage = False
+                for (sx, sy) in square:
+                    if not (0 <= sx < self.width and 0 <= sy < self.height):
+                        continue
+                    c = sy * self.width + sx
+                    if self.obstacle_mask >> c & 1:
+                        continue
+                    if not boxes >> c & 1:
+                        break
+                    if not self.storage_mask >> c & 1:
+                        off_storage = True
+                else:
+                    if off_storage:
+                        return True
+        return False
+
+    def reachable(self, cell, blocked):
+        '''
+        @return: The bitboard of the cells a robot at cell can walk to when the
+                 cells of the blocked bitboard (e.g. the boxes) are occupied.
+        '''
+        steps = self.steps
+        region = 1 << cell
+        frontier = [cell]
+        while frontier:
+            c = frontier.pop()
+            for step in steps:
+                n = step[c]
+                if n >= 0 and not (region | blocked) >> n & 1:
+                    region |= 1 << n
+                    frontier.append(n)
+        return region
+
+    def walks(self, cell, blocked):
+        '''
+        @return: A dict of the least number of moves a robot at cell needs to
+                 reach each of the cells it can walk to when the cells of the
+                 blocked bitboard are occupied.
+        '''
+        steps = self.steps
+        distance = {cell: 0}
+        frontier = [cell]
+        moves = 0
+        while frontier:
+            moves += 1
+            next_frontier = []
+            for c in frontier:
+                for step in steps:
+                    n = step[c]
+                    if n >= 0 and n not in distance and not blocked >> n & 1:
+                        distance[n] = moves
+                        next_frontier.append(n)
+            frontier = next_frontier
+        return distance
+
+    def region_cell(self, cell, blocked):
+        '''@return: The lowest cell of the region reachable from cell (see reachable),
+                    which names the region.'''
+        region = self.reachable(cell, blocked)
+        return (region & -region).bit_length() - 1
+
+    def cell(self, location):
+        '''@return: The cell index of an (x, y) location.'''
+        return location[1] * self.width + location[0]
+
+    def mask(self, locations):
+        '''@return: The bitboard of a collection of (x, y) locations.'''
+        bits = 0
+        for location in locations:
+            bits |= 1 << (location[1] * self.width + location[0])
+        return bits
+
+    def locations(self, bits):
+        '''@return: The frozenset of (x, y) locations of a bitboard.'''
+        return frozenset(self.coords[c] for c in bit_cells(bits))
+
+
+#Push distance of the cells from which a box cannot reach a storage point.
+UNREACHABLE = 0xFFFF
+
+#The number of levels (and of rooms, for the walk distance and tunnel tables)
+#whose tables are cached; the least recently used ones are dropped beyond it,
+#so long-lived processes (batch_solve, the portfolio workers) stay bounded.
+_MAX_LEVELS = 64
+_MAX_ROOMS = 16
+
+@functools.lru_cache(maxsize=_MAX_LEVELS)
+def sokoban_level(width, height, storage, obstacles):
+    '''@return: The (cached) SokobanLevel for the given static problem data.'''
+    return SokobanLevel(width, height, storage, obstacles)
+
+def freeze_deadlock(state):
+    '''
+    Pruning stage for SearchEngine.init_search: True if the box the last
+    action pushed is now in a freeze deadlock or in a 2x2 block deadlock (see
+    SokobanLevel). Only the neighbourhood of the moved box is examined, as a
+    state without a deadlock there has none its parent did not have.
+    '''
+    if isinstance(state, PackedSokobanState):
+        if state.moved_box < 0:
+            return False
+        level, boxes, cell = state.level, state.box_bits, state.moved_box
+    else:
+        if state.moved_box is None:
+            return False
+        level = sokoban_level(state.width, state.height, state.storage, state.obstacles)
+        boxes, cell = level.mask(state.boxes), level.cell(state.moved_box)
+    return level.block_deadlock(boxes, cell) or level.freeze_deadlock(boxes, cell)
+
+@functools.lru_cache(maxsize=_MAX_ROOMS)
+def walk_distances(width, height, obstacles):
+    '''@return: The (cached) all pairs walk distance table of a room, see SokobanLevel.walk_distance.'''
+    level = sokoban_level(width, height, frozenset(), obstacles)
+    size = level.size
+    table = array('H', [UNREACHABLE]) * (size * size)
+    for source in range(size):
+        if level.obstacle_mask >> source & 1:
+            continue
+        row = source * size
+        table[row + source] = 0
+        frontier = [source]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for c in frontier:
+                for step in level.steps:
+                    n = step[c]
+                    if n >= 0 and table[row + n] == UNREACHABLE:
+                        table[row + n] = distance
+                        next_frontier.append(n)
+            frontier = next_frontier
+    return table
+
+@functools.lru_cache(maxsize=_MAX_ROOMS)
+def tunnel_masks(width, height, obstacles):
+    '''@return: The (cached) tunnel bitboards of a room, see SokobanLevel.tunnel_masks.'''
+    level = sokoban_level(width, height, frozenset(), obstacles)
+    vertical = horizontal = 0
+    for c in range(level.size):
+        if level.obstacle_mask >> c & 1:
+            continue
+        if level.steps[1][c] < 0 and level.steps[3][c] < 0:
+            vertical |= 1 << c
+        if level.steps[0][c] < 0 and level.steps[2][c] < 0:
+            horizontal |= 1 << c
+    return (vertical, horizontal)
+
+def distance_sums(table, cells):
+    '''
+    Scores a batch of states at once: cells holds one equally long list of
+    cell indices per state (e.g. the cells of its boxes), and the score of a
+    state is the sum of table[c] over its cells. Uses NumPy when available.
+    @return: The list of scores, in the order of cells.
+    '''
+    if not cells:
+        return []
+    if numpy is not None:
+        lookup = _NUMPY_TABLES.get(id(table))
+        if lookup is None or lookup[0] is not table:
+            lookup = _NUMPY_TABLES[id(table)] = (table, numpy.frombuffer(table, dtype=numpy.uint16).astype(numpy.int64))
+            while len(_NUMPY_TABLES) > _MAX_LEVELS:
+                _NUMPY_TABLES.popitem(last=False)
+        _NUMPY_TABLES.move_to_end(id(table))
+        return lookup[1][numpy.array(cells, dtype=numpy.intp)].sum(axis=1).tolist()
+    return [sum([table[c] for c in row]) for row in cells]
+
+#NumPy copies of the distance tables used by distance_sums, by id of the table,
+#least recently used first (at most _MAX_LEVELS of them)
+_NUMPY_TABLES = OrderedDict()
+
+def bit_cells(bits):
+    '''Iterates over the cell indices set in a bitboard, lowest first.'''
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class PackedSokobanState(StateSpace):
+    '''
+    A Sokoban state in the compact encoding of SokobanLevel: robot_cells is a
+    tuple of cell indices and box_bits the bitboard of the boxes. The
+    attributes of SokobanState (robots, boxes, storage, ...) are available as
+    properties, so code written for SokobanState keeps working on packed
+    states, only more slowly.
+    '''
+
+    __slots__ = ('level', 'robot_cells', 'box_bits', 'moved_box')
+
+    #Set to True to drop the successors that push a box onto a dead square.
+    prune_dead_squares = False
+
+    def __init__(self, action, gval, parent, level, robot_cells, box_bits, moved_box=-1):
+        '''
+        @param moved_box: The cell the last action pushed a box to, -1 if it pushed no box.
+        '''
+        StateSpace.__init__(self, action, gval, parent)
+        self.level = level
+        self.robot_cells = robot_cells
+        self.box_bits = box_bits
+        self.moved_box = moved_box
+
+    def successors(self):
+        '''
+        Generates all the actions that can be performed from this state, and the states those actions will create.
+        '''
+        successors = []
+        transition_cost = 1
+        level = self.level
+        robots = self.robot_cells
+        dead = level.dead_mask if self.prune_dead_squares else 0
+
+        for robot in range(0, len(robots)):
+            cell = robots[robot]
+            for d in range(0, 4):
+                step = level.steps[d]
+                new_cell = step[cell]
+                if new_cell < 0 or new_cell in robots:
+                    continue
+
+                boxes = self.box_bits
+                new_box_cell = -1
+                if boxes >> new_cell & 1:
+                    new_box_cell = step[new_cell]
+                    if new_box_cell < 0 or new_box_cell in robots or (boxes | dead) >> new_box_cell & 1:
+                        continue
+                    boxes = boxes ^ (1 << new_cell) | (1 << new_box_cell)
+
+                new_robots = robots[:robot] + (new_cell,) + robots[robot + 1:]
+                successors.append(PackedSokobanState(str(robot) + " " + DIRECTIONS[d].name, self.gval + transition_cost,
+                                                     self, level, new_robots, boxes, new_box_cell))
+
+        return successors
+
+    def hashable_state(self):
+        '''Return a data item that can be used as a dictionary key to UNIQUELY represent a state.'''
+        robot_bits = 0
+        for cell in self.robot_cells:
+            robot_bits = (robot_bits << self.level.cell_bits) | cell
+        return (self.box_bits, robot_bits)
+
+    def packed_key(self):
+        '''Return an integer that UNIQUELY represents a state: the box bitboard,
+           with the robot cells above it.'''
+        box_bits, robot_bits = self.hashable_state()
+        return (robot_bits << self.level.size) | box_bits
+
+    def unpack(self):
+        '''Returns this state as a SokobanState.'''
+        return SokobanState(self.action, self.gval, self.parent, self.width, self.height,
+                            self.robots, self.boxes, self.storage, self.obstacles)
+
+    @property
+    def width(self): return self.level.width
+
+    @property
+    def height(self): return self.level.height
+
+    @property
+    def storage(self): return self.level.storage
+
+    @property
+    def obstacles(self): return self.level.obstacles
+
+    @property
+    def robots(self): return tuple(self.level.coords[c] for c in self.robot_cells)
+
+    @property
+    def boxes(self): return self.level.locations(self.box_bits)
+
+    state_string = SokobanState.state_string
+    print_state = SokobanState.print_state
+
+
+class PullSokobanState(PackedSokobanState):
+    '''
+    A state of the reverse (pull) Sokoban search space, in the encoding of
+    PackedSokobanState. Searching backwards from the goal configurations
+    (see pull_start_states), a robot walks into a free cell and may pull the
+    box behind it into the cell it leaves: undoing the forward action of the
+    same robot in the opposite direction.
+    '''
+
+    __slots__ = ()
+
+    def successors(self):
+        '''
+        Generates all the pulls and moves that can be performed from this state, and the states they create.
+        An action "<robot> <direction>" is undone by the forward action of the robot in the opposite direction.
+        '''
+        successors = []
+        transition_cost = 1
+        level = self.level
+        robots = self.robot_cells
+        dead = level.dead_mask if self.prune_dead_squares else 0
+
+        for robot in range(0, len(robots)):
+            cell = robots[robot]
+            for d in range(0, 4):
+                new_cell = level.steps[d][cell]
+                if new_cell < 0 or new_cell in robots or self.box_bits >> new_cell & 1:
+                    continue
+                new_robots = robots[:robot] + (new_cell,) + robots[robot + 1:]
+                action = str(robot) + " " + DIRECTIONS[d].name
+                successors.append(PullSokobanState(action, self.gval + transition_cost,
+                                                   self, level, new_robots, self.box_bits))
+
+                #pull the box behind the robot along
+                box_cell = level.steps[(d + 2) % 4][cell]
+                if box_cell >= 0 and self.box_bits >> box_cell & 1 and not dead >> cell & 1:
+                    boxes = self.box_bits ^ (1 << box_cell) | (1 << cell)
+                    successors.append(PullSokobanState(action, self.gval + transition_cost,
+                                                       self, level, new_robots, boxes, cell))
+
+        return successors
+
+
+def pull_start_states(state):
+    '''
+    The start states of the reverse search of a Sokoban problem: every way to
+    put its boxes on storage points, with each robot placed (on the lowest free
+    cell) in each region of the room the boxes leave. Any robot position of a
+    region is as good a goal as any other, see pull_meet_key.
+    @param state: The initial SokobanState or PackedSokobanState of the problem.
+    @return: A list of PullSokobanStates.
+    '''
+    if not isinstance(state, PackedSokobanState):
+        state = state.pack()
+    level = state.level
+    starts = []
+    for cells in itertools.combinations(level.storage_cells, bin(state.box_bits).count("1")):
+        boxes = 0
+        for c in cells:
+            boxes |= 1 << c
+        blocked = boxes | level.obstacle_mask
+        regions = []
+        for c in range(level.size):
+            if not blocked >> c & 1:
+                region = level.reachable(c, blocked)
+                regions.append(sorted(bit_cells(region)))
+                blocked |= region
+        for placement in itertools.product(regions, repeat=len(state.robot_cells)):
+            robots = []
+            for region in placement:
+                free = [c for c in region if c not in robots]
+                if not free:
+                    break
+                robots.append(free[0])
+            else:
+                starts.append(PullSokobanState("START", 0, None, level, tuple(robots), boxes))
+    return starts
+
+def pull_meet_key(state):
+    '''
+    The key under which the forward and the reverse searches of
+    SearchEngine.bidirectional_search meet: the box bitboard and the region
+    (see SokobanLevel.region_cell) of every robot, as the robots can walk
+    anywhere in their regions without moving a box.
+    '''
+    if not isinstance(state, PackedSokobanState):
+        state = state.pack()
+    return (state.box_bits, tuple(state.level.region_cell(c, state.box_bits) for c in state.robot_cells))
+
+def robot_walk(level, boxes, start, goal):
+    '''
+    Breadth first search for the shortest sequence of single robot moves that
+    takes the robots from the cells start to the cells goal without moving a box.
+    @return: A list of (robot, direction index) moves, or None if there is none.
+    '''
+    parents = {start: None}
+    frontier = deque([start])
+    while frontier:
+        robots = frontier.popleft()
+        if robots == goal:
+            moves = []
+            while parents[robots] is not None:
+                robots, move = parents[robots]
+                moves.append(move)
+            moves.reverse()
+            return moves
+        for robot in range(0, len(robots)):
+            for d in range(0, 4):
+                new_cell = level.steps[d][robots[robot]]
+                if new_cell < 0 or new_cell in robots or boxes >> new_cell & 1:
+                    continue
+                new_robots = robots[:robot] + (new_cell,) + robots[robot + 1:]
+                if new_robots not in parents:
+                    parents[new_robots] = (robots, (robot, d))
+                    frontier.append(new_robots)
+    return None
+
+def join_pull_path(forward, reverse):
+    '''
+    Joins a forward state and a PullSokobanState with the same pull_meet_key
+    into a goal state of the forward search space: the robots walk from their
+    forward cells to their reverse cells, then the actions of the reverse path
+    are undone in turn. The parent chain of the goal state is the whole plan.
+    @return: The goal state (of the class of forward), or False if the robots
+             cannot get into place.
+    '''
+    packed = forward if isinstance(forward, PackedSokobanState) else forward.pack()
+    moves = robot_walk(reverse.level, reverse.box_bits, packed.robot_cells, reverse.robot_cells)
+    if moves is None:
+        return False
+    for action in reversed(reverse.path_actions()):
+        move = action_move(action)
+        if move is not None:
+            moves.append((move[0], (move[1] + 2) % 4))
+    return apply_moves(forward, moves)
+
+def action_move(action):
+    '''
+    @return: The (robot, direction index) move of a "<robot> <direction>" action, or None for
+             a pass "<robot> wait" of operator decomposition (see SokobanState.decompose_moves).
+    '''
+    robot, name = action.split(" ")
+    if name == WAIT:
+        return None
+    return int(robot), [d.name for d in DIRECTIONS].index(name)
+
+def apply_moves(state, moves):
+    '''
+    Performs a sequence of single robot moves (pushing the boxes in the way).
+    Under operator decomposition the robots whose turn comes first pass it.
+    @param moves: A list of (robot, direction index) moves.
+    @return: The successor of state reached by the moves, or False if one of them is not possible.
+    '''
+    for robot, d in moves:
+        action = str(robot) + " " + DIRECTIONS[d].name
+        while True:
+            successors = state.successors()
+            for succ in successors:
+                if succ.action == action:
+                    state = succ
+                    break
+            else:
+                #not the robot's turn: pass (the passes in a row are bounded by decompose_moves)
+                waits = [succ for succ in successors if action_move(succ.action) is None]
+                if not waits:
+                    return False
+                state = waits[0]
+                continue
+            break
+    return state
+
+
+class PushSokobanState(PackedSokobanState):
+    '''
+    A state of the push-level Sokoban search space, in the encoding of
+    PackedSokobanState. Every action is a macro: a robot walks (without
+    moving a box) to a cell next to a box and pushes it, at a cost of one
+    per move. A state is keyed on its boxes and the region (see
+    SokobanLevel.region_cell) of each robot, so states that only differ in
+    where the robots stand in their regions are the same state. The action
+    of a state is its push "<robot> <direction>"; unit_path expands the
+    walks back in.
+
+    As the key ignores where the robots stand, two states with the same key
+    can have different gvals (the walks to them differ), and full cycle
+    checking keeps whichever is expanded first. The plans found are valid
+    but not optimal: the gval counts moves, and a state reached with fewer
+    moves (or pushes) can be pruned as a duplicate of a costlier one, so
+    astar and anytime repairing astar minimize neither (e.g., 12 moves on
+    PROBLEMS[4], whose best plan takes 8). Only exact_robot_keys improves on
+    this: set it to key the states on the cells of the robots instead,
+    for move-optimal plans of single robot problems (at the price of more
+    states; with several robots the macros never walk a robot out of the
+    way of another, so some plans cannot be found at all).
+    '''
+
+    __slots__ = ('key', 'macro')
+
+    #Set to True to push a box that enters a tunnel (see SokobanLevel.tunnel_masks)
+    #through it in the same action.
+    tunnel_macros = False
+
+    #Set to True to push a box that reaches the entrance of a goal room (see
+    #SokobanLevel.goal_rooms) on to the next storage point of the room in the
+    #same action, and never push the boxes the room was filled with again.
+    goal_room_macros = False
+
+    #Set to True to key the states on the cells of the robots rather than on
+    #their regions, so that astar finds plans with the fewest moves (with one robot).
+    exact_robot_keys = False
+
+    def __init__(self, action, gval, parent, level, robot_cells, box_bits, moved_box=-1, macro=None):
+        '''
+        @param macro: None for a single push, else a tuple (box, moves): the cell of the pushed
+                      box before the push and the directions of the moves that follow it.
+        '''
+        PackedSokobanState.__init__(self, action, gval, parent, level, robot_cells, box_bits, moved_box)
+        self.key = None
+        self.macro = macro
+
+    def successors(self):
+        '''
+        Generates all the pushes that can be performed from this state, and the states they create.
+        '''
+        successors = []
+        level = self.level
+        robots = self.robot_cells
+        boxes = self.box_bits
+        dead = level.dead_mask if self.prune_dead_squares else 0
+        robot_bits = 0
+        for cell in robots:
+            robot_bits |= 1 << cell
+
+        tunnels = level.tunnel_masks if self.tunnel_macros else None
+        rooms = level.goal_rooms if self.goal_room_macros else {}
+        #the boxes of the goal rooms filled in order so far stay where they are
+        filled = 0
+        for room, order, prefixes, allowed in rooms.values():
+            k = bin(boxes & room).count("1")
+            if k < len(prefixes) and boxes & room == prefixes[k]:
+                filled |= boxes & room
+
+        for robot in range(0, len(robots)):
+            others = robot_bits ^ (1 << robots[robot])
+            distance = level.walks(robots[robot], boxes | others)
+            for box in bit_cells(boxes & ~filled):
+                for d in range(0, 4):
+                    target = level.steps[d][box]
+                    if target < 0 or (boxes | others | dead) >> target & 1:
+                        continue
+                    walk = distance.get(level.steps[(d + 2) % 4][box])
+                    if walk is None:
+                        continue
+                    robot_cell, box_cell = box, target
+                    new_boxes = boxes ^ (1 << box) | (1 << target)
+                    moves = ()
+
+                    if tunnels is not None:
+                        #in a tunnel the robot can only push the box on
+                        tunnel = tunnels[d % 2]
+                        while (tunnel >> robot_cell & 1 and tunnel >> box_cell & 1 and
+                               not level.storage_mask >> box_cell & 1):
+                            next_cell = level.steps[d][box_cell]
+                            if next_cell < 0 or (new_boxes | others | dead) >> next_cell & 1:
+                                break
+                            robot_cell, box_cell = box_cell, next_cell
+                            new_boxes = new_boxes ^ (1 << robot_cell) | (1 << box_cell)
+                            moves = moves + (d,)
+
+                    if box_cell in rooms:
+                        room, order, prefixes, allowed = rooms[box_cell]
+                        k = bin(new_boxes & room).count("1")
+                        if k < len(order) and new_boxes & room == prefixes[k]:
+                            path = level.push_path(box_cell, robot_cell, order[k],
+                                                   new_boxes ^ (1 << box_cell) | others, allowed)
+                            if path is not None:
+                                new_boxes ^= 1 << box_cell
+                                for m in path:
+                                    robot_cell = level.steps[m][robot_cell]
+                                    if robot_cell == box_cell:
+                                        box_cell = level.steps[m][box_cell]
+                                new_boxes |= 1 << box_cell
+                                moves = moves + tuple(path)
+
+                    new_robots = robots[:robot] + (robot_cell,) + robots[robot + 1:]
+                    successors.append(PushSokobanState(str(robot) + " " + DIRECTIONS[d].name,
+                                                       self.gval + walk + 1 + len(moves), self, level, new_robots,
+                                                       new_boxes, box_cell, (box, moves) if moves else None))
+
+        return successors
+
+    def hashable_state(self):
+        '''Return a data item that can be used as a dictionary key to UNIQUELY represent a state.'''
+        if self.key is None:
+            if self.exact_robot_keys:
+                self.key = (self.box_bits, self.robot_cells)
+            else:
+                self.key = (self.box_bits, tuple(self.level.region_cell(c, self.box_bits) for c in self.robot_cells))
+        return self.key
+
+    def packed_key(self):
+        '''Return an integer that UNIQUELY represents a state: the box bitboard,
+           with the region cells (or the cells) of the robots above it.'''
+        box_bits, regions = self.hashable_state()
+        region_bits = 0
+        for cell in regions:
+            region_bits = (region_bits << self.level.cell_bits) | cell
+        return (region_bits << self.level.size) | box_bits
+
+    def unit_path(self):
+        '''
+        @return: The PackedSokobanState at the end of the single robot moves
+                 of the path to this state, whose parent chain has the usual
+                 "<robot> <direction>" actions (e.g. for print_path).
+        '''
+        states = self.path()
+        level = self.level
+        root = states[0]
+        unit = PackedSokobanState(root.action, root.gval, None, level, root.robot_cells, root.box_bits)
+        for parent, child in zip(states, states[1:]):
+            robot, d = action_move(child.action)
+            box, extra = child.macro if child.macro is not None else (child.robot_cells[robot], ())
+            push_cell = level.steps[(d + 2) % 4][box]
+            others = level.mask(parent.robots) ^ (1 << parent.robot_cells[robot])
+            moves = robot_walk(level, parent.box_bits | others, (parent.robot_cells[robot],), (push_cell,))
+            unit = apply_moves(unit, [(robot, move) for _, move in moves] + [(robot, d)] +
+                                     [(robot, move) for move in extra])
+        return unit
+
+    def print_path(self):
+        '''print the sequence of single robot moves used to reach self'''
+        self.unit_path().print_path()
+
+
+def push_level_state(state):
+    '''
+    @return: The PushSokobanState of a SokobanState or PackedSokobanState (starting a new path).
+             Its plans are valid but not optimal: see PushSokobanState.exact_robot_keys.
+    '''
+    if not isinstance(state, PackedSokobanState):
+        state = state.pack()
+    return PushSokobanState(state.action, state.gval, None, state.level, state.robot_cells, state.box_bits)
+
+
+def parse_state_string(text):
+    '''
+    Reads a Sokoban problem back from the ASCII art of SokobanState.state_string:
+    '#' for the walls and obstacles, '.' for the storage points, '$' for a box
+    ('*' on a storage point) and letters for the robots ('a' for robot 0, 'b'
+    for robot 1, ..., upper case on a storage point). Lines outside the walled
+    map (e.g., the "ACTION was" line of print_state) are ignored.
+    @return: The initial SokobanState of the problem.
+    '''
+    rows = [line.rstrip('\n') for line in text.splitlines() if line.startswith('#')]
+    if len(rows) < 3:
+        raise ValueError("No Sokoban map in {!r}".format(text))
+    width = len(rows[0]) - 2
+    height = len(rows) - 2
+    robots = dict()
+    boxes = set()
+    storage = set()
+    obstacles = set()
+    for y, row in enumerate(rows[1:-1]):
+        row = row[1:width + 1].ljust(width)
+        for x, char in enumerate(row):
+            if char == '#':
+                obstacles.add((x, y))
+            elif char in '.*' or char.isupper():
+                storage.add((x, y))
+            if char in '$*':
+                boxes.add((x, y))
+            elif char.isalpha():
+                robots[ord(char.lower()) - ord('a')] = (x, y)
+            elif char not in ' .#':
+                raise ValueError("Unknown cell {!r} at ({}, {})".format(char, x, y))
+    if sorted(robots) != list(range(0, len(robots))):
+        raise ValueError("Robots must be numbered a, b, c, ... without gaps")
+    return SokobanState("START", 0, None, width, height, tuple(robots[i] for i in range(0, len(robots))),
+                        frozenset(boxes), frozenset(storage), frozenset(obstacles))
+
+def sokoban_goal_state(state):
+  '''Returns True if we have reached a goal state'''
+  '''INPUT: a sokoban state'''
+  '''OUTPUT: True (if goal) or False (if not)'''  
+  for box in state.boxes:
+    if box not in state.storage:
+      return False
+  return True
+
+'''
+Sokoban Problem Set, for testing
+'''
+PROBLEMS = (
+    SokobanState("START", 0, None, 5, 5, # dimensions
+                 ((2, 1), (2, 3)), #robots
+                 frozenset(((1, 1), (1, 3), (3, 1), (3, 3))), #boxes
+                 frozenset(((0, 0), (0, 4), (4, 0), (4, 4))), #storage
+                 frozenset(((1, 0), (2, 0), (3, 0), (1, 4), (2, 4), (3, 4))) #obstacles
+                 ),
+    SokobanState("START", 0, None, 5, 5, # dimensions
+                 ((2, 1), (2, 3)), #robots
+                 frozenset(((1, 1),)), #boxes
+                 frozenset(((0, 0),)), #storage
+                 frozenset(((1, 0), (2, 0), (3, 0), (1, 4), (2, 4), (3, 4))) #obstacles
+                 ),
+    SokobanState("START", 0, None, 5, 5, # dimensions
+                 ((2, 2),), #robots
+                 frozenset(((1, 1), (1, 3), (3, 1), (3, 3))), #boxes
+                 frozenset(((0, 0), (0, 4), (4, 0), (4, 4))), #storage
+                 frozenset(((1, 0), (2, 0), (3, 0), (1, 4), (2, 4), (3, 4))) #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 4, # dimensions
+                 ((2, 1), (2, 2)), #robots
+                 frozenset(((1, 1), (4, 2))), #boxes
+                 frozenset(((2, 1), (2, 2))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 4, # dimensions
+                 ((2, 1), (2, 2)), #robots
+                 frozenset(((4, 2),)), #boxes
+                 frozenset(((2, 1),)), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 5, 5, # dimensions
+                 ((4, 0), (4, 4)), #robots
+                 frozenset(((3, 1), (3, 2), (3, 3))), #boxes
+                 frozenset(((0, 0), (0, 2), (0, 4))), #storage
+                 frozenset(((2, 0), (2, 1), (2, 3), (2, 4))) #obstacles
+                 ),
+    SokobanState("START", 0, None, 5, 5, # dimensions
+                 ((4, 0), (4, 4)), #robots
+                 frozenset(((3, 1), (3, 2))), #boxes
+                 frozenset(((0, 0), (0, 2))), #storage
+                 frozenset(((2, 0), (2, 1), (2, 3), (2, 4))) #obstacles
+                 ),
+    SokobanState("START", 0, None, 5, 5, # dimensions
+                 ((4, 0),), #robots
+                 frozenset(((3, 1), (3, 2), (3, 3))), #boxes
+                 frozenset(((0, 0), (0, 2), (0, 4))), #storage
+                 frozenset(((2, 0), (2, 1), (2, 3), (2, 4))) #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((0, 0), (0, 2), (0, 4)), #robots
+                 frozenset(((1, 0), (1, 2), (1, 4))), #boxes
+                 frozenset(((5, 0), (5, 2), (0, 5))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((0, 0), (0, 2), (0, 4), (5, 5)), #robots
+                 frozenset(((1, 0), (4, 1), (1, 2), (4, 3), (1, 4), (4, 5))), #boxes
+                 frozenset(((5, 0), (0, 1), (5, 2), (0, 3), (5, 4), (0, 5))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((5, 5), (5, 4), (4, 5)), #robots
+                 frozenset(((3, 1), (2, 2), (1, 4), (3, 4))), #boxes
+                 frozenset(((0, 0), (0, 1), (1, 0), (1, 1))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((5, 5), (5, 4), (4, 5)), #robots
+                 frozenset(((3, 1), (1, 4), (3, 4))), #boxes
+                 frozenset(((0, 0), (0, 1), (1, 0))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((5, 5), (5, 4), (4, 5)), #robots
+                 frozenset(((3, 1), (2, 2), (1, 4))), #boxes
+                 frozenset(((0, 0), (0, 1), (1, 0))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((5, 5), (5, 4)), #robots
+                 frozenset(((3, 1), (1, 4), (3, 4))), #boxes
+                 frozenset(((0, 0), (0, 1), (1, 0))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 6, 6, # dimensions
+                 ((5, 5), (5, 4)), #robots
+                 frozenset(((3, 1), (2, 2), (1, 4))), #boxes
+                 frozenset(((0, 0), (0, 1), (1, 0))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 8, 8, # dimensions
+                 ((0, 5), (1, 6), (2, 7)), #robots
+                 frozenset(((5, 6), (4, 5), (6, 2), (5, 2), (4, 6))), #boxes
+                 frozenset(((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (0, 2))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 8, 8, # dimensions
+                 ((0, 5), (1, 6), (2, 7)), #robots
+                 frozenset(((6, 2), (5, 6), (4, 4), (6, 3))), #boxes
+                 frozenset(((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (0, 2))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 8, 8, # dimensions
+                 ((0, 5), (1, 6), (2, 7)), #robots
+                 frozenset(((5, 4), (5, 5), (6, 3), (4, 2), (6, 5), (5, 3))), #boxes
+                 frozenset(((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (0, 2))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 8, 8, # dimensions
+                 ((0, 5), (1, 6), (2, 7)), #robots
+                 frozenset(((6, 6), (5, 6), (6, 2), (4, 3), (5, 1), (6, 5))), #boxes
+                 frozenset(((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (0, 2))), #storage
+                 frozenset() #obstacles
+                 ),
+    SokobanState("START", 0, None, 8, 8, # dimensions
+                 ((0, 5), (1, 6), (2, 7)), #robots
+                 frozenset(((6, 6), (4, 5), (4, 1), (4, 3), (5, 2), (5, 3))), #boxes
+                 frozenset(((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (0, 2))), #storage
+                 frozenset() #obstacles
+                 )
+    )
+
+
+'''
+Sokoban Directions: encodes directions of movement that are possible for each robot.
+'''
+class Direction():
+    '''
+    A direction of movement.
+    '''
+    
+    def __init__(self, name, delta):
+        '''
+        Creates a new direction.
+        @param name: The direction's name.
+        @param delta: The coordinate modification needed for moving in the specified direction.
+        '''
+        self.name = name
+        self.delta = delta
+    
+    def __hash__(self):
+        '''
+        The hash method must be implemented for actions to be inserted into sets 
+        and dictionaries.
+        @return: The hash value of the action.
+        '''
+        return hash(self.name)
+    
+    def __str__(self):
+        '''
+        @return: The string representation of this object when *str* is called.
+        '''
+        return str(self.name)
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    def move(self, location):
+        '''
+        @return: Moving from the given location in this direction will result in the returned location.
+        '''
+        return (location[0] + self.delta[0], location[1] + self.delta[1])
+
+
+#Global Directions
+UP = Direction("up", (0, -1))
+RIGHT = Direction("right", (1, 0))
+DOWN = Direction("down", (0, 1))
+LEFT = Direction("left", (-1, 0))
+
+#The order in which successors() tries the directions.
+DIRECTIONS = (UP, RIGHT, DOWN, LEFT)
+
+#The direction name of the pass actions of operator decomposition
+WAIT = "wait"
+
+
+
+  
@@ -0,0 +1,94 @@
+'''Procedural Sokoban level generator.
+
+   A level is built backwards from a goal configuration: obstacles are
+   scattered over the room (keeping the free cells connected), the boxes are
+   put on randomly chosen storage points and the robots on other free cells,
+   and then random moves of the reverse (pull) search space (see
+   PullSokobanState) drag the boxes away. As every pull undoes a push, the
+   configuration reached is the start of a solvable level.
+
+   generate_levels is an iterator, so arbitrarily long streams of levels can
+   be produced for batch runs; the same seed always gives the same levels.
+'''
+
+import random
+
+from sokoban import SokobanState, SokobanLevel, PullSokobanState
+
+def generate_levels(width, height, density = 0.1, boxes = 2, robots = 1, seed = None, pulls = None, count = None):
+    '''
+    Generate solvable Sokoban levels.
+    @param width: The room's X dimension.
+    @param height: The room's Y dimension.
+    @param density: The probability of each cell to be an obstacle.
+    @param boxes: The number of boxes (and storage points).
+    @param robots: The number of robots.
+    @param seed: The seed of the random generator (None for a random one).
+    @param pulls: The number of random reverse moves per level (by default
+                  4*(width+height)*boxes). More moves scatter the boxes further.
+    @param count: The number of levels to generate, None for an endless stream.
+    @return: An iterator of initial SokobanStates.
+    '''
+    rng = random.Random(seed)
+    if pulls is None:
+        pulls = 4 * (width + height) * boxes
+    generated = 0
+    while count is None or generated < count:
+        room = _random_room(rng, width, height, density, boxes + robots + 1)
+        state = _scatter(rng, room, boxes, robots, pulls)
+        if state is None:
+            continue
+        generated = generated + 1
+        yield SokobanState("START", 0, None, width, height, state.robots, state.boxes,
+                           state.storage, state.obstacles)
+
+def _random_room(rng, width, height, density, min_free):
+    #a level with random obstacles (no storage yet) whose free cells are connected
+    while True:
+        obstacles = frozenset((x, y) for y in range(0, height) for x in range(0, width) if rng.random() < density)
+        level = SokobanLevel(width, height, frozenset(), obstacles)
+        free = [c for c in range(level.size) if not level.obstacle_mask >> c & 1]
+        if len(free) < min_free:
+            continue
+        #keep the largest connected part of the room
+        seen = 0
+        largest = 0
+        for c in free:
+            if not seen >> c & 1:
+                region = level.reachable(c, level.obstacle_mask)
+                seen |= region
+                if bin(region).count("1") > bin(largest).count("1"):
+                    largest = region
+        if bin(largest).count("1") < min_free:
+            continue
+        obstacles = obstacles | frozenset(level.coords[c] for c in free if not largest >> c & 1)
+        return SokobanLevel(width, height, frozenset(), obstacles)
+
+def _scatter(rng, room, boxes, robots, pulls):
+    #put the boxes on storage and pull them away, None if no box left its storage point
+    free = [c for c in range(room.size) if not room.obstacle_mask >> c & 1]
+    storage = rng.sample(free, boxes)
+    level = SokobanLevel(room.width, room.height, frozenset(room.coords[c] for c in storage), room.obstacles)
+    robot_cells = tuple(rng.sample([c for c in free if c not in storage], robots))
+    box_bits = 0
+    for c in storage:
+        box_bits |= 1 << c
+    state = PullSokobanState("START", 0, None, level, robot_cells, box_bits)
+    for i in range(0, pulls):
+        successors = state.successors()
+        moves = [succ for succ in successors if succ.box_bits != state.box_bits]
+        #prefer pulling a box to walking
+        if not moves or rng.random() < 0.3:
+            moves = successors
+        if not moves:
+            break
+        state = rng.choice(moves)
+        state.parent = None
+    if not state.box_bits & ~level.storage_mask:
+        return None
+    return state
+
+if __name__ == "__main__":
+    for state in generate_levels(8, 7, density=0.15, boxes=3, robots=2, seed=384, count=3):
+        state.print_state()
+        print("")
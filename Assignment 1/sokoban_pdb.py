@@ -0,0 +1,270 @@
+'''Pattern databases for Sokoban.
+
+   A pattern database (PDB) of size k of a level stores, for every placement
+   of k boxes on the live cells of the level (the free cells that are not
+   dead squares), the least number of pushes that put all k boxes on storage
+   points when the robots are abstracted away (a box can be pushed whenever
+   the cell behind it and the cell in front of it are free) and the other
+   boxes are removed. Every push of a solution moves a single box, so the
+   PDB value of a subset of the boxes never exceeds the number of moves
+   still needed, and the values of disjoint subsets can be added.
+
+   The tables are computed by a breadth first search backwards from the
+   goal placements (pulling boxes away from the storage points) and stored
+   as arrays of 16 bit values, indexed by the rank of the placement in the
+   combinatorial number system, in files named by a fingerprint of the level.
+   The files are memory-mapped when read back, so a table is built once and
+   shared by later runs and by all the processes that use it. build_pdbs
+   builds the tables of many levels in a pool of processes.
+
+   The heuristics are kept here rather than in solution.py, which only
+   imports search and sokoban (see its header): they need the table files.
+'''
+
+import functools
+import hashlib
+import itertools
+import mmap
+import multiprocessing
+import os
+import sys
+import tempfile
+from array import array
+
+from sokoban import PROBLEMS, PackedSokobanState, sokoban_level, bit_cells, UNREACHABLE
+
+#Directory of the table files
+PDB_DIR = os.environ.get('SOKOBAN_PDB_DIR', os.path.join(tempfile.gettempdir(), 'sokoban_pdb'))
+
+#Bumped whenever the layout of the table files changes
+_FORMAT = 1
+
+class PatternDatabase:
+    '''
+    The PDB of size k of a level: table[rank(placement)] is the number of
+    pushes of the placement, UNREACHABLE if it cannot be solved.
+    '''
+
+    def __init__(self, level, k, table):
+        self.level = level
+        self.k = k
+        self.table = table
+        self.live = live_cells(level)
+        #index[c] is the position of cell c in live, -1 for the cells that are not live
+        self.index = array('i', [-1] * level.size)
+        for i, c in enumerate(self.live):
+            self.index[c] = i
+        self.binomial = _binomials(len(self.live), k)
+
+    def lookup(self, cells):
+        '''@return: The pushes needed to store the boxes on cells (k of them), ignoring the others.'''
+        indices = []
+        for c in cells:
+            i = self.index[c]
+            if i < 0:
+                return UNREACHABLE
+            indices.append(i)
+        indices.sort()
+        return self.table[_rank(indices, self.binomial)]
+
+    def value(self, cells, combine = 'max'):
+        '''
+        Estimate the pushes needed to store all the boxes on cells.
+        @param combine: 'max' for the largest value of any k of the boxes, 'additive'
+                        for the sum of the values of disjoint groups of k boxes
+                        (consecutive in cell order, the boxes left over counting their
+                        push distance to the nearest storage point).
+        @return: The estimate, UNREACHABLE if the boxes cannot be stored.
+        '''
+        k = self.k
+        if combine == 'max':
+            hval = 0
+            for group in itertools.combinations(cells, k):
+                hval = max(hval, self.lookup(group))
+            return hval
+        if combine == 'additive':
+            cells = sorted(cells)
+            whole = len(cells) - len(cells) % k
+            hval = 0
+            for i in range(0, whole, k):
+                hval = hval + self.lookup(cells[i:i+k])
+            for c in cells[whole:]:
+                hval = hval + self.level.nearest_push[c]
+            return min(hval, UNREACHABLE)
+        raise ValueError("Unknown combination {}".format(combine))
+
+def live_cells(level):
+    '''@return: The cells a box of a solvable placement can be on, in increasing order.'''
+    dead = level.obstacle_mask | level.dead_mask
+    return [c for c in range(level.size) if not dead >> c & 1]
+
+def _binomials(n, k):
+    #binomial[i][j] = C(i, j) for i <= n, j <= k
+    binomial = [[0] * (k + 1) for i in range(n + 1)]
+    for i in range(n + 1):
+        binomial[i][0] = 1
+        for j in range(1, min(i, k) + 1):
+            binomial[i][j] = binomial[i-1][j-1] + binomial[i-1][j]
+    return binomial
+
+def _rank(indices, binomial):
+    #rank of a sorted tuple of distinct indices in the combinatorial number system
+    rank = 0
+    for j, i in enumerate(indices):
+        rank = rank + binomial[i][j+1]
+    return rank
+
+def build_table(level, k):
+    '''
+    Compute the PDB of size k of a level by a backward breadth first search
+    from the placements of the k boxes on distinct storage points.
+    @return: The table, an array('H').
+    '''
+    live = live_cells(level)
+    index = dict((c, i) for i, c in enumerate(live))
+    binomial = _binomials(len(live), k)
+    table = array('H', [UNREACHABLE]) * binomial[len(live)][k]
+    steps = level.steps
+
+    frontier = []
+    for placement in itertools.combinations(sorted(index[c] for c in level.storage_cells), k):
+        table[_rank(placement, binomial)] = 0
+        frontier.append(placement)
+    distance = 0
+    while frontier:
+        distance = distance + 1
+        next_frontier = []
+        for placement in frontier:
+            cells = [live[i] for i in placement]
+            occupied = 0
+            for c in cells:
+                occupied |= 1 << c
+            for b in range(0, k):
+                for step in steps:
+                    #the box came from the cell next to it, pushed by a robot
+                    #standing one cell further in the same direction
+                    c = step[cells[b]]
+                    if c < 0 or occupied >> c & 1 or c not in index:
+                        continue
+                    r = step[c]
+                    if r < 0 or occupied >> r & 1:
+                        continue
+                    previous = sorted(placement[:b] + placement[b+1:] + (index[c],))
+                    rank = _rank(previous, binomial)
+                    if table[rank] == UNREACHABLE:
+                        table[rank] = distance
+                        next_frontier.append(tuple(previous))
+        frontier = next_frontier
+    return table
+
+def fingerprint(level):
+    '''@return: A hex string identifying the static data of a level (and the table format).'''
+    data = repr((_FORMAT, sys.byteorder, level.width, level.height,
+                 sorted(level.storage), sorted(level.obstacles)))
+    return hashlib.sha1(data.encode()).hexdigest()[:20]
+
+def pdb_path(level, k, directory = PDB_DIR):
+    return os.path.join(directory, "{}-{}.pdb".format(fingerprint(level), k))
+
+def save_table(table, path):
+    '''Write a table to path atomically, so concurrent readers never see a partial file.'''
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            table.tofile(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def load_table(path, count):
+    '''@return: The memory-mapped table of count entries stored at path, or None if there is none.'''
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size != 2 * count:
+                return None
+            if count == 0:
+                return array('H')
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast('H')
+    except OSError:
+        return None
+
+#The number of PatternDatabases kept open, the least recently used are dropped beyond it
+_MAX_PDBS = 8
+
+@functools.lru_cache(maxsize=_MAX_PDBS)
+def pattern_database(level, k, directory = PDB_DIR):
+    '''
+    @return: The (cached) PatternDatabase of size k of a level, read from
+             directory, or built and saved there if it is not yet.
+    '''
+    path = pdb_path(level, k, directory)
+    count = _binomials(len(live_cells(level)), k)[-1][k]
+    table = load_table(path, count)
+    if table is None:
+        save_table(build_table(level, k), path)
+        table = load_table(path, count)
+    return PatternDatabase(level, k, table)
+
+def _build_job(job):
+    width, height, storage, obstacles, k, directory = job
+    level = sokoban_level(width, height, storage, obstacles)
+    path = pdb_path(level, k, directory)
+    if load_table(path, _binomials(len(live_cells(level)), k)[-1][k]) is None:
+        save_table(build_table(level, k), path)
+    return path
+
+def build_pdbs(states, sizes = (2, 3), directory = PDB_DIR, processes = None):
+    '''
+    Build (offline) the PDBs of the levels of a list of states that are not
+    in directory yet, one table per process of a pool.
+    @param states: SokobanStates (or PackedSokobanStates) of the levels.
+    @param sizes: The sizes of the tables to build for every level.
+    @return: The paths of the table files.
+    '''
+    jobs = []
+    for state in states:
+        level = _state_level(state)
+        for k in sizes:
+            job = (level.width, level.height, level.storage, level.obstacles, k, directory)
+            if job not in jobs:
+                jobs.append(job)
+    if processes == 1 or len(jobs) <= 1:
+        return [_build_job(job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_build_job, jobs)
+
+def _state_level(state):
+    if isinstance(state, PackedSokobanState):
+        return state.level
+    return sokoban_level(state.width, state.height, state.storage, state.obstacles)
+
+def _box_cells(state, level):
+    if isinstance(state, PackedSokobanState):
+        return list(bit_cells(state.box_bits))
+    return [level.cell(box) for box in state.boxes]
+
+def pdb_heuristic(k = 2, combine = 'max', directory = PDB_DIR):
+    '''
+    @return: An admissible heuristic function (state -> estimate) that looks up
+             the PDBs of size k (fewer for states with fewer boxes), combined
+             as in PatternDatabase.value.
+    '''
+    def heur_pdb(state):
+        level = _state_level(state)
+        cells = _box_cells(state, level)
+        pdb = pattern_database(level, min(k, len(cells)), directory)
+        hval = pdb.value(cells, combine)
+        return float('inf') if hval >= UNREACHABLE else hval
+    return heur_pdb
+
+heur_pdb_max = pdb_heuristic(2, 'max')
+heur_pdb_additive = pdb_heuristic(2, 'additive')
+
+if __name__ == "__main__":
+    paths = build_pdbs(PROBLEMS)
+    print("{} tables in {}".format(len(paths), PDB_DIR))
+    for i in range(0, len(PROBLEMS)):
+        print("PROBLEM {}: max {}, additive {}".format(i, heur_pdb_max(PROBLEMS[i]), heur_pdb_additive(PROBLEMS[i])))
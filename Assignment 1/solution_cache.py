@@ -0,0 +1,227 @@
+'''Persistent solution cache for Sokoban.
+
+   Plans are stored under a fingerprint of the canonical form of their
+   problem: of the eight rotations and reflections of the room, the one whose
+   (width, height, robots, boxes, storage, obstacles) sorts first. Problems
+   that are rotations or reflections of each other share one entry, and a
+   plan is mapped to and from the canonical frame by turning its directions.
+
+   anytime_weighted_astar and anytime_gbfs wrap the solvers of solution.py:
+   a cached plan is returned at once (replayed from the initial state, so the
+   result is a goal state like the one the solver returns), and new plans are
+   added to the cache. The cache keeps the cheapest plan of every problem and
+   whether its cost is proven optimal, i.e., the solver reported that it
+   exhausted its search space (see the report argument of the solvers). With refine=True a cached plan that is
+   not proven optimal is used as the initial cost bound of a search for a
+   cheaper one. The least recently used entries are dropped beyond max_entries.
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from sokoban import DIRECTIONS, apply_moves, action_move
+import solution
+
+#File of the default cache
+CACHE_PATH = os.environ.get('SOKOBAN_CACHE', os.path.join(tempfile.gettempdir(), 'sokoban_solutions.json'))
+
+#Heuristics that never overestimate: anytime weighted astar with one of them
+#proves the cost of its last plan optimal when it runs out of states at weight 1.
+ADMISSIBLE = [solution.heur_zero, solution.trivial_heuristic,
+              solution.heur_manhattan_distance, solution.heur_matching]
+
+#The eight symmetries of a rectangle: map (x, y) of a width x height room,
+#the room being height x width after the transforms that swap the axes.
+_SYMMETRIES = (
+    lambda x, y, w, h: (x, y),
+    lambda x, y, w, h: (h - 1 - y, x),
+    lambda x, y, w, h: (w - 1 - x, h - 1 - y),
+    lambda x, y, w, h: (y, w - 1 - x),
+    lambda x, y, w, h: (w - 1 - x, y),
+    lambda x, y, w, h: (x, h - 1 - y),
+    lambda x, y, w, h: (y, x),
+    lambda x, y, w, h: (h - 1 - y, w - 1 - x),
+)
+
+def _turned_directions(symmetry):
+    #turned[d] is the index of the image of DIRECTIONS[d] under symmetry
+    deltas = [direction.delta for direction in DIRECTIONS]
+    ox, oy = symmetry(1, 1, 3, 3)
+    turned = []
+    for dx, dy in deltas:
+        x, y = symmetry(1 + dx, 1 + dy, 3, 3)
+        turned.append(deltas.index((x - ox, y - oy)))
+    return tuple(turned)
+
+_TURNED = tuple(_turned_directions(symmetry) for symmetry in _SYMMETRIES)
+
+def canonical_form(state):
+    '''
+    @return: A pair (fingerprint, symmetry): the hex fingerprint of the canonical form
+             of the problem of state and the index in _SYMMETRIES of the transform
+             mapping state to it.
+    '''
+    w, h = state.width, state.height
+    best = None
+    for i, symmetry in enumerate(_SYMMETRIES):
+        dims = (w, h) if i in (0, 2, 4, 5) else (h, w)
+        form = (dims,
+                tuple(symmetry(x, y, w, h) for (x, y) in state.robots),
+                tuple(sorted(symmetry(x, y, w, h) for (x, y) in state.boxes)),
+                tuple(sorted(symmetry(x, y, w, h) for (x, y) in state.storage)),
+                tuple(sorted(symmetry(x, y, w, h) for (x, y) in state.obstacles)))
+        if best is None or form < best[0]:
+            best = (form, i)
+    return hashlib.sha1(repr(best[0]).encode()).hexdigest(), best[1]
+
+def plan_moves(state):
+    '''
+    @return: The list of (robot, direction index) moves leading to state from the initial state
+             (without the passes of operator decomposition, which apply_moves puts back).
+    '''
+    moves = []
+    for action in state.path_actions():
+        move = action_move(action)
+        if move is not None:
+            moves.append(move)
+    return moves
+
+class SolutionCache:
+    '''
+    An LRU map from the canonical fingerprint of a problem to its best known
+    plan, {"cost": ..., "optimal": ..., "moves": [[robot, direction], ...]}
+    in the canonical frame, saved to a JSON file after every change.
+    '''
+
+    def __init__(self, path = CACHE_PATH, max_entries = 1000):
+        '''
+        @param path: The file of the cache, None to keep it in memory only.
+        @param max_entries: The number of problems kept.
+        '''
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = OrderedDict(json.load(f))
+            except (OSError, ValueError):
+                self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, initial_state):
+        '''
+        @return: A pair (goal state, optimal): the cached plan of the problem
+                 of initial_state replayed from it, or None if there is none.
+        '''
+        key, symmetry = canonical_form(initial_state)
+        entry = self.entries.get(key)
+        if entry is not None:
+            turned = _TURNED[symmetry]
+            goal = apply_moves(initial_state, [(robot, turned.index(d)) for robot, d in entry["moves"]])
+            if goal and solution.sokoban_goal_state(goal):
+                self.entries.move_to_end(key)
+                self.hits = self.hits + 1
+                return goal, entry["optimal"]
+            #stale entry (e.g., from a different successor function)
+            del self.entries[key]
+        self.misses = self.misses + 1
+        return None
+
+    def store(self, initial_state, goal_state, optimal = False):
+        '''
+        Record the plan of goal_state for the problem of initial_state, unless a
+        cheaper one is cached already.
+        '''
+        key, symmetry = canonical_form(initial_state)
+        entry = self.entries.get(key)
+        if entry is not None and (entry["cost"] < goal_state.gval or
+                                  (entry["cost"] == goal_state.gval and entry["optimal"] >= optimal)):
+            self.entries.move_to_end(key)
+            return
+        turned = _TURNED[symmetry]
+        self.entries[key] = {"cost": goal_state.gval, "optimal": optimal,
+                             "moves": [[robot, turned[d]] for robot, d in plan_moves(goal_state)]}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.save()
+
+    def prove_optimal(self, initial_state):
+        '''Mark the cached plan of the problem of initial_state as optimal.'''
+        entry = self.entries.get(canonical_form(initial_state)[0])
+        if entry is not None and not entry["optimal"]:
+            entry["optimal"] = True
+            self.save()
+
+    def save(self):
+        '''Write the cache to its file atomically.'''
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+_CACHE = None
+
+def default_cache():
+    '''@return: The cache in CACHE_PATH, opened on first use.'''
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = SolutionCache()
+    return _CACHE
+
+def cached_solve(solver, initial_state, timebound, proves_optimal, cache = None, refine = False):
+    '''
+    Look the problem of initial_state up in the cache, and call solver(timebound,
+    costbound, report) on a miss (or, with refine, with the cost of a cached plan that is not
+    proven optimal as costbound). The solver sets report['exhausted'] when it ran out of states.
+    @param proves_optimal: Whether the plan of the solver is optimal when it runs out of states.
+    @return: The goal state of the cheapest plan known, or False.
+    '''
+    if cache is None:
+        cache = default_cache()
+    hit = cache.lookup(initial_state)
+    if hit is not None and (hit[1] or not refine):
+        return hit[0]
+
+    costbound = hit[0].gval if hit is not None else None
+    report = dict()
+    final = solver(timebound, costbound, report)
+    proven = proves_optimal and report.get('exhausted', False)
+    if final and (hit is None or final.gval < hit[0].gval):
+        cache.store(initial_state, final, proven)
+        return final
+    if hit is not None:
+        if proven:
+            #no plan is cheaper than the cached one
+            cache.prove_optimal(initial_state)
+        return hit[0]
+    return final
+
+def anytime_weighted_astar(initial_state, heur_fn, weight=1., timebound = 10, strategy = 'ara', node_limit = None,
+                           cache = None, refine = False):
+    '''solution.anytime_weighted_astar behind the solution cache (the default cache if cache is None)'''
+    solver = lambda timebound, costbound, report: solution.anytime_weighted_astar(
+        initial_state, heur_fn, weight, timebound, strategy, node_limit, costbound, report)
+    return cached_solve(solver, initial_state, timebound, heur_fn in ADMISSIBLE, cache, refine)
+
+def anytime_gbfs(initial_state, heur_fn, timebound = 10, cache = None, refine = False):
+    '''solution.anytime_gbfs behind the solution cache (the default cache if cache is None)'''
+    solver = lambda timebound, costbound, report: solution.anytime_gbfs(initial_state, heur_fn, timebound, costbound,
+                                                                        report)
+    #the search is only bounded by the cost of the plans, so running out of states proves optimality
+    return cached_solve(solver, initial_state, timebound, True, cache, refine)
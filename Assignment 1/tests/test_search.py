@@ -0,0 +1,33 @@
+import pytest
+
+from search import SearchEngine
+from sokoban import PROBLEMS, SokobanState
+import solution
+
+
+def run(strategy, initial_state, cc, heur_fn=solution.heur_manhattan_distance, timebound=20):
+    se = SearchEngine(strategy, cc)
+    se.init_search(initial_state, solution.sokoban_goal_state, heur_fn)
+    return se, se.search(timebound)
+
+
+def astar(initial_state, cc, heur_fn=solution.heur_manhattan_distance, timebound=20):
+    return run('astar', initial_state, cc, heur_fn, timebound)
+
+
+@pytest.mark.parametrize('strategy', ['astar', 'best_first', 'breadth_first', 'depth_first', 'ucs'])
+@pytest.mark.parametrize('problem', [1, 7])
+def test_compact_closed_list_searches_like_the_full_one(problem, strategy):
+    full, full_goal = run(strategy, PROBLEMS[problem], 'full')
+    compact, compact_goal = run(strategy, PROBLEMS[problem], 'compact')
+    assert full_goal.gval == compact_goal.gval
+    assert full_goal.path_actions() == compact_goal.path_actions()
+    assert full.stats.expansions == compact.stats.expansions
+
+
+def test_compact_keys_tell_decomposed_turns_apart(monkeypatch):
+    monkeypatch.setattr(SokobanState, 'decompose_moves', True)
+    full, full_goal = astar(PROBLEMS[4], 'full')
+    compact, compact_goal = astar(PROBLEMS[4], 'compact')
+    assert full_goal.gval == compact_goal.gval
+    assert full.stats.expansions == compact.stats.expansions
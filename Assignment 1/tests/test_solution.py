@@ -0,0 +1,39 @@
+import pytest
+
+from search import SearchEngine
+from sokoban import PROBLEMS
+import solution
+from solution_cache import ADMISSIBLE
+
+
+def optimal_goal(initial_state, timebound=10):
+    se = SearchEngine('ucs', 'full')
+    se.init_search(initial_state, solution.sokoban_goal_state, solution.heur_zero)
+    return se.search(timebound)
+
+
+@pytest.mark.parametrize('heur_fn', ADMISSIBLE, ids=lambda heur_fn: heur_fn.__name__)
+@pytest.mark.parametrize('problem', [1, 7])
+def test_admissible_heuristics_never_overestimate(problem, heur_fn):
+    goal = optimal_goal(PROBLEMS[problem])
+    #every state on an optimal plan is goal.gval - state.gval moves from the goal
+    state = goal
+    while state is not None:
+        assert heur_fn(state) <= goal.gval - state.gval
+        state = state.parent
+
+
+@pytest.mark.parametrize('problem', [1, 7])
+def test_ara_exhausts_with_an_optimal_plan(problem):
+    report = dict()
+    final = solution.anytime_weighted_astar(PROBLEMS[problem], solution.heur_manhattan_distance,
+                                            weight=10, timebound=10, report=report)
+    assert report['exhausted']
+    assert final.gval == optimal_goal(PROBLEMS[problem]).gval
+
+
+def test_ara_out_of_time_is_not_exhausted():
+    report = dict()
+    solution.anytime_weighted_astar(PROBLEMS[0], solution.heur_manhattan_distance,
+                                    weight=10, timebound=0.5, report=report)
+    assert not report['exhausted']
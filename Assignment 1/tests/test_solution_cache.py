@@ -0,0 +1,68 @@
+import pytest
+
+from search import SearchEngine
+from sokoban import PROBLEMS, SokobanState, apply_moves
+import solution
+from solution_cache import SolutionCache, cached_solve, plan_moves, _SYMMETRIES
+
+
+def astar_solver(initial_state):
+    def solver(timebound, costbound, report):
+        se = SearchEngine('astar', 'full')
+        se.init_search(initial_state, solution.sokoban_goal_state, solution.heur_manhattan_distance)
+        final = se.search(timebound)
+        report['exhausted'] = se.exhausted
+        return final
+    return solver
+
+
+def transformed(state, symmetry):
+    '''The problem of state with every location mapped by symmetry'''
+    w, h = state.width, state.height
+    corners = [symmetry(x, y, w, h) for x in (0, w - 1) for y in (0, h - 1)]
+    width = max(x for x, _ in corners) + 1
+    height = max(y for _, y in corners) + 1
+    locations = lambda cells: frozenset(symmetry(x, y, w, h) for (x, y) in cells)
+    return SokobanState("START", 0, None, width, height,
+                        tuple(symmetry(x, y, w, h) for (x, y) in state.robots),
+                        locations(state.boxes), locations(state.storage), locations(state.obstacles))
+
+
+@pytest.mark.parametrize('problem', [1, 4, 7])
+def test_plan_replays_to_the_same_goal(problem):
+    se = SearchEngine('astar', 'full')
+    se.init_search(PROBLEMS[problem], solution.sokoban_goal_state, solution.heur_manhattan_distance)
+    final = se.search(20)
+    goal = apply_moves(PROBLEMS[problem], plan_moves(final))
+    assert goal.gval == final.gval
+    assert goal.robots == final.robots and goal.boxes == final.boxes
+
+
+@pytest.mark.parametrize('symmetry', range(len(_SYMMETRIES)))
+def test_symmetric_problems_share_a_cache_entry(symmetry):
+    #PROBLEMS[4] is not square, so half of the symmetries swap its dimensions
+    initial = PROBLEMS[4]
+    cache = SolutionCache(None)
+    final = cached_solve(astar_solver(initial), initial, 20, True, cache)
+
+    hit = cache.lookup(transformed(initial, _SYMMETRIES[symmetry]))
+    assert hit is not None
+    goal, optimal = hit
+    assert solution.sokoban_goal_state(goal) and goal.gval == final.gval
+    assert len(cache) == 1
+
+
+def test_decomposed_plan_replays_through_cache(monkeypatch):
+    monkeypatch.setattr(SokobanState, 'decompose_moves', True)
+    initial = PROBLEMS[1]
+    cache = SolutionCache(None)
+
+    final = cached_solve(astar_solver(initial), initial, 5, True, cache)
+    assert final and solution.sokoban_goal_state(final)
+    assert any(action.endswith(" wait") for action in final.path_actions())
+    assert len(plan_moves(final)) == final.gval
+
+    hit = cache.lookup(initial)
+    assert hit is not None
+    goal, optimal = hit
+    assert solution.sokoban_goal_state(goal) and goal.gval == final.gval